@@ -6,7 +6,9 @@ import os
 from config import Config
 from routes.auth import auth_bp, User
 from routes.api import api_bp
-from database import init_db, get_user_by_id, get_user_by_email, create_user
+from ml.predictor import predictor
+from utils.http_cache import HTTPCache
+from database import init_db, get_user_by_id, get_user_by_email, create_user, enable_write_behind
 
 app = Flask(__name__, 
             template_folder=os.path.abspath(os.path.join(os.path.dirname(__file__), 'templates')),
@@ -15,8 +17,12 @@ app.config.from_object(Config)
 
 # Initialize DB
 init_db()
+if Config.CHAT_WRITE_BEHIND:
+    enable_write_behind(max_size=Config.CHAT_QUEUE_SIZE, batch_size=Config.CHAT_BATCH_SIZE,
+                        flush_interval=Config.CHAT_FLUSH_INTERVAL, ack=Config.CHAT_WRITE_ACK)
 
 CORS(app)
+HTTPCache(app)
 
 # Login Manager
 login_manager = LoginManager()
@@ -45,6 +51,10 @@ google = oauth.register(
     client_kwargs={'scope': 'openid email profile'},
 )
 
+# Hot-reload new model versions published by train_model.py (every worker polls)
+if Config.MODEL_WATCH_INTERVAL > 0:
+    predictor.start_watcher(Config.MODEL_WATCH_INTERVAL)
+
 app.register_blueprint(api_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/auth')
 
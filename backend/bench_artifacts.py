@@ -0,0 +1,60 @@
+"""
+Benchmark for model artifact loading.
+
+Starts a fresh interpreter per scenario and measures time to load artifacts,
+time to the first prediction and resident memory, for the legacy single
+model.pkl and the split manifest layout. Run from the backend folder after
+`python ml/train_model.py --legacy-pickle` so both layouts exist:
+
+    python bench_artifacts.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+CHILD = r'''
+import json, resource, sys, time
+start = time.perf_counter()
+from ml.predictor import predictor
+if sys.argv[1] == 'legacy':
+    predictor.artifacts_dir = '/nonexistent'
+predictor.load_artifacts()
+loaded = time.perf_counter()
+predictor.check_symptom('fever')
+validate_ready = time.perf_counter()
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+predictor.predict(['fever', 'headache', 'chills'])
+first_prediction = time.perf_counter()
+print(json.dumps({
+    'load_ms': (loaded - start) * 1000,
+    'validate_ms': (validate_ready - start) * 1000,
+    'first_prediction_ms': (first_prediction - start) * 1000,
+    'rss_before_predict_mb': rss_before / 1024,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+'''
+
+
+def run(layout):
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', CHILD, layout],
+                         cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if out.returncode != 0:
+        print(f"{layout}: failed\n{out.stderr}")
+        return None
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'Layout':<8} | {'load ms':>8} | {'validate ms':>11} | {'1st predict ms':>14} | "
+          f"{'RSS pre-predict MB':>18} | {'peak RSS MB':>11}")
+    print("-" * 86)
+    for layout in ('legacy', 'split'):
+        r = run(layout)
+        if r:
+            print(f"{layout:<8} | {r['load_ms']:8.0f} | {r['validate_ms']:11.0f} | {r['first_prediction_ms']:14.0f} | "
+                  f"{r['rss_before_predict_mb']:18.1f} | {r['rss_mb']:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Concurrent read/write benchmark for the database layer.
+
+Runs the same mixed workload (user lookups as done by Flask-Login on every
+request, plus chat message inserts) from several threads against:
+  - legacy: a new sqlite3 connection per call, default rollback journal
+  - pooled: database.py's per-thread pooled connections in WAL mode, with
+            its user cache turned off so every lookup reaches SQLite
+  - pooled + user cache: the same, with user lookups served from the TTL
+            user cache after the first hit (what the app runs)
+Each mode uses its own temporary database. Run from the backend folder:
+
+    python bench_database.py [threads] [ops_per_thread] [write_ratio]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import database
+
+
+def legacy_get_user_by_id(path, user_id):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+    conn.close()
+    return user
+
+
+def legacy_save_chat_message(path, user_id, sender, message):
+    conn = sqlite3.connect(path)
+    conn.execute('INSERT INTO messages (user_id, session_id, sender, message) VALUES (?, ?, ?, ?)',
+                 (user_id, None, sender, message))
+    conn.commit()
+    conn.close()
+
+
+def seed(path, users=50):
+    database.DB_PATH = path
+    database.clear_user_cache() # Ids repeat across the temporary databases
+    database.init_db()
+    for i in range(users):
+        database.create_user(f"User {i}", f"user{i}@example.com", "password")
+    database.close_thread_connections()
+
+
+def run_workload(read, write, threads, ops, write_ratio):
+    errors = []
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(seed_value):
+        rng = random.Random(seed_value)
+        local = []
+        for i in range(ops):
+            start = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    write(rng.randint(1, 50), 'user', f"message {seed_value}-{i}")
+                else:
+                    read(rng.randint(1, 50))
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'ops_per_sec': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': len(errors)
+    }
+
+
+def run_pooled(path, threads, ops, write_ratio, user_cache):
+    seed(path)
+    database.DB_PATH = path
+    maxsize = database._user_cache.maxsize
+    if not user_cache:
+        database._user_cache.maxsize = 0 # Every entry is evicted as soon as it is set
+    try:
+        return run_workload(database.get_user_by_id, database.save_chat_message, threads, ops, write_ratio)
+    finally:
+        database._user_cache.maxsize = maxsize
+        database.close_thread_connections()
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    write_ratio = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    original_path = database.DB_PATH
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        seed(legacy_path)
+        conn = sqlite3.connect(legacy_path)
+        conn.execute('PRAGMA journal_mode=DELETE') # The old default
+        conn.close()
+        legacy = run_workload(
+            lambda uid: legacy_get_user_by_id(legacy_path, uid),
+            lambda uid, sender, msg: legacy_save_chat_message(legacy_path, uid, sender, msg),
+            threads, ops, write_ratio)
+
+        pooled = run_pooled(os.path.join(tmp, 'pooled.db'), threads, ops, write_ratio, user_cache=False)
+        cached = run_pooled(os.path.join(tmp, 'cached.db'), threads, ops, write_ratio, user_cache=True)
+        database.DB_PATH = original_path
+
+    print(f"Threads: {threads}, ops/thread: {ops}, write ratio: {write_ratio}")
+    print(f"{'Mode':<20} | {'ops/s':>9} | {'p50 ms':>8} | {'p99 ms':>8} | {'errors':>6}")
+    print("-" * 64)
+    for name, r in (('legacy', legacy), ('pooled', pooled), ('pooled + user cache', cached)):
+        print(f"{name:<20} | {r['ops_per_sec']:9.0f} | {r['p50_ms']:8.3f} | {r['p99_ms']:8.3f} | {r['errors']:6d}")
+    print(f"Throughput gain from pooling: {pooled['ops_per_sec'] / legacy['ops_per_sec']:.2f}x, "
+          f"with the user cache on top: {cached['ops_per_sec'] / legacy['ops_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
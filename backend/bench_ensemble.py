@@ -0,0 +1,98 @@
+"""
+Accuracy against latency for the ensemble execution plan (ENSEMBLE_* in
+config.py). Symptom sets are 1-4 symptoms drawn from each disease in
+ml/data/disease_symptoms.csv, so the right answer is known. For every
+setting, DiseasePredictor.predict runs with an empty prediction cache and
+the report shows mean / p99 latency, top-1 accuracy, how often the winner
+matches a full run, the average number of models run and the early exit
+reasons. With threads > 1 the calls run concurrently, which is where the
+latency budget starts cutting the plan short. Run from the backend folder
+after training:
+
+    python bench_ensemble.py [sets_per_disease] [threads]
+"""
+import os
+import sys
+import time
+import warnings
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from ml.predictor import ArtifactSet, predictor
+
+SETTINGS = [
+    # label, overrides of the Config defaults
+    ('full comparison', {'full_comparison': True}),
+    ('early exit (defaults)', {}),
+    ('confidence 95, no agreement', {'ENSEMBLE_CONFIDENCE': 95, 'ENSEMBLE_AGREEMENT': 0}),
+    ('agreement 2', {'ENSEMBLE_AGREEMENT': 2}),
+    ('budget 1 ms only', {'ENSEMBLE_CONFIDENCE': 0, 'ENSEMBLE_AGREEMENT': 0, 'ENSEMBLE_BUDGET_MS': 1}),
+]
+
+
+def symptom_sets(per_disease, seed=0):
+    df = pd.read_csv(os.path.join(predictor.data_dir, 'disease_symptoms.csv'))
+    rng = np.random.default_rng(seed)
+    sets = []
+    for disease, symptoms in df.groupby('disease')['symptom']:
+        symptoms = list(symptoms)
+        for _ in range(per_disease):
+            k = int(rng.integers(1, min(4, len(symptoms)) + 1))
+            sets.append((disease, [str(s) for s in rng.choice(symptoms, k, replace=False)]))
+    return sets
+
+
+def run(sets, threads, full_comparison):
+    def one(symptoms):
+        # Cold cache for every call: the cost of a symptom set seen for the first time
+        predictor.prediction_cache.clear()
+        start = time.perf_counter()
+        result = predictor.predict(symptoms, full_comparison=full_comparison)
+        return result, (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(one, [symptoms for _, symptoms in sets]))
+
+
+def main():
+    per_disease = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    warnings.simplefilter('ignore')
+    predictor._ensure_loaded()
+    sets = symptom_sets(per_disease)
+    truth = [disease for disease, _ in sets]
+    defaults = {name: getattr(Config, name) for name in dir(Config) if name.startswith('ENSEMBLE_')}
+    print(f"{len(sets)} symptom sets, {threads} thread(s), plan: {', '.join(predictor._state.execution_plan(Config.ENSEMBLE_PLAN))}")
+
+    for use_engines in (True, False):
+        predictor._state = ArtifactSet(predictor.model_path, predictor.artifacts_dir, predictor.data_dir, use_engines).load()
+        run(sets[:20], 1, True) # Warm up, loads every model
+        print(f"\nNumPy engines {'on' if use_engines else 'off'}")
+        print(f"{'setting':<28} | {'mean ms':>7} | {'p99 ms':>7} | {'accuracy':>8} | {'= full':>6} | {'models':>6} | exits")
+        print("-" * 110)
+        full_winners = None
+        for label, overrides in SETTINGS:
+            for name, value in overrides.items():
+                if name.startswith('ENSEMBLE_'):
+                    setattr(Config, name, value)
+            results = run(sets, threads, overrides.get('full_comparison', False))
+            for name, value in defaults.items():
+                setattr(Config, name, value)
+
+            winners = [r['disease'] if r else None for r, _ in results]
+            full_winners = full_winners or winners
+            latencies = sorted(ms for _, ms in results)
+            accuracy = np.mean([w == t for w, t in zip(winners, truth)])
+            same = np.mean([w == f for w, f in zip(winners, full_winners)])
+            models = np.mean([len(r['models_run']) for r, _ in results if r])
+            exits = Counter(r['early_exit'] or 'none' for r, _ in results if r)
+            print(f"{label:<28} | {np.mean(latencies):7.2f} | {latencies[int(len(latencies) * 0.99) - 1]:7.2f} | "
+                  f"{accuracy:8.3f} | {same:6.3f} | {models:6.2f} | {dict(exits)}")
+
+
+if __name__ == "__main__":
+    main()
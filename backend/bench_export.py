@@ -0,0 +1,106 @@
+"""
+Peak memory of a full-history export as the history grows: building the
+whole body in memory (fetchall + one JSON/ZIP blob) vs the streaming
+/api/export generators (utils/export.py).
+
+Each size is seeded into a temporary database, then every mode runs in its own
+child process so ru_maxrss is that mode's own peak. Run from the backend folder:
+
+    python bench_export.py [messages,...] [reports]
+"""
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+import database
+
+
+def seed(path, messages, reports):
+    database.DB_PATH = path
+    database.clear_user_cache() # Ids repeat across the temporary databases
+    database.init_db()
+    database.create_user('Bench User', 'bench@example.com', 'password')
+    user_id = database.get_user_by_email('bench@example.com')['id']
+    with database._connection() as conn:
+        sessions = [(f"s{i}", user_id, f"Session {i}") for i in range(max(1, messages // 100))]
+        conn.executemany('INSERT INTO sessions (id, user_id, title) VALUES (?, ?, ?)', sessions)
+        conn.executemany(
+            'INSERT INTO messages (user_id, session_id, sender, message) VALUES (?, ?, ?, ?)',
+            ((user_id, f"s{i // 100}", 'user' if i % 2 else 'bot', f"I have had fever and headache since day {i}")
+             for i in range(messages)))
+        conn.executemany(
+            'INSERT INTO diagnoses (user_id, session_id, disease, confidence, severity) VALUES (?, ?, ?, ?, ?)',
+            ((user_id, 's0', 'Malaria', 80.0 + i % 10, 'High') for i in range(reports)))
+        conn.commit()
+    database.close_thread_connections()
+    return user_id
+
+
+def naive(kind, user_id):
+    # What an export looks like without streaming: every row, then one body
+    with database._connection() as conn:
+        rows = [dict(r) for r in conn.execute('SELECT * FROM messages WHERE user_id = ? ORDER BY timestamp, id', (user_id,)).fetchall()]
+    body = ''.join(json.dumps(dict(type='message', **r), default=str) + '\n' for r in rows).encode('utf-8')
+    if kind == 'zip':
+        from utils.pdf_gen import generate_pdf
+        from ml.predictor import predictor
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('history.ndjson', body)
+            with database._connection() as conn:
+                diagnoses = conn.execute('SELECT * FROM diagnoses WHERE user_id = ?', (user_id,)).fetchall()
+            for i, row in enumerate(diagnoses):
+                zf.writestr(f"reports/{i}.pdf", generate_pdf('Bench User', predictor.format_response(row['disease'], row['confidence'], [])))
+        body = buffer.getvalue()
+    return len(body)
+
+
+def streamed(kind, user_id):
+    from utils.export import iter_ndjson, iter_zip
+    chunks = iter_zip(user_id, 'Bench User') if kind == 'zip' else iter_ndjson(user_id)
+    return sum(len(chunk) for chunk in chunks)
+
+
+def child(path, mode, kind, user_id):
+    database.DB_PATH = path
+    if kind == 'zip':
+        from ml.predictor import predictor
+        predictor.format_response('Malaria', 1.0, []) # Model and records loaded before measuring
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    size = (streamed if mode == 'stream' else naive)(kind, user_id)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'bytes': size, 'seconds': elapsed, 'growth_kb': peak - before, 'peak_kb': peak}))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5]))
+        return
+    sizes = [int(n) for n in sys.argv[1].split(',')] if len(sys.argv) > 1 else [10000, 100000, 500000]
+    reports = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(f"Reports per ZIP: {reports}. RSS growth = peak RSS during the export minus RSS before it.")
+    print(f"{'messages':>9} | {'format':>6} | {'mode':>6} | {'body MB':>8} | {'seconds':>8} | {'RSS growth MB':>13}")
+    print("-" * 66)
+    with tempfile.TemporaryDirectory() as tmp:
+        for messages in sizes:
+            path = os.path.join(tmp, f'export_{messages}.db')
+            user_id = seed(path, messages, reports)
+            for kind in ('ndjson', 'zip'):
+                for mode in ('naive', 'stream'):
+                    out = subprocess.run([sys.executable, __file__, '--child', path, mode, kind, str(user_id)],
+                                         capture_output=True, text=True, check=True).stdout
+                    r = json.loads(out.strip().splitlines()[-1])
+                    print(f"{messages:9d} | {kind:>6} | {mode:>6} | {r['bytes'] / 1e6:8.1f} | {r['seconds']:8.2f} | {r['growth_kb'] / 1024:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
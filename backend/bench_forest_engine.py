@@ -0,0 +1,149 @@
+"""
+Size, memory and latency of the compiled forests (ml/forest_engine.py)
+against the scikit-learn models they were exported from:
+  - bytes on disk: models/<slug>.joblib vs the engines/<slug>/ directory
+  - private (anonymous) memory a fresh process gains by loading the model
+    and scoring one row; memory-mapped pages are shared and not counted
+  - predict_proba latency for one patient and for a batch of 64, the
+    scikit-learn timings including the feature matrix the engine skips
+With --synthetic [n_diseases] [n_symptoms] the same comparison also runs on
+a forest fitted to a synthetic catalogue (ml/synthetic.py), as a stand-in for
+a larger disease set. Run from the backend folder after training:
+
+    python bench_forest_engine.py [iterations] [--synthetic [n_diseases] [n_symptoms]]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from ml.forest_engine import ForestEngine, export_forest, save_forest
+from ml.predictor import predictor
+
+
+def per_call_ms(fn, calls, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(calls[i % len(calls)])
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+MEMORY_CHECK = """
+import sys, warnings
+import numpy as np, joblib, scipy.sparse
+from ml.forest_engine import ForestEngine
+warnings.simplefilter('ignore')
+
+def anonymous_kb():
+    with open('/proc/self/smaps_rollup') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('Anonymous:'))
+
+kind, path, n_features = sys.argv[1], sys.argv[2], int(sys.argv[3])
+X = np.zeros((1, n_features)); X[0, :3] = 1
+if kind == 'sklearn':
+    from sklearn.ensemble import RandomForestClassifier # Imported up front, not counted
+before = anonymous_kb()
+if kind == 'sklearn':
+    joblib.load(path, mmap_mode='c').predict_proba(X)
+else:
+    ForestEngine.load(path).predict_proba([(0, 1, 2)])
+print(anonymous_kb() - before)
+"""
+
+
+def private_kb(kind, path, n_features):
+    # Anonymous memory a fresh worker gains by loading the model and scoring one
+    # row: private to each process, unlike pages of a memory-mapped file
+    output = subprocess.run([sys.executable, '-c', MEMORY_CHECK, kind, path, str(n_features)], capture_output=True,
+                            text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    return int(output) if output.lstrip('-').isdigit() else float('nan')
+
+
+def dense_features(rows, n_features):
+    X = np.zeros((len(rows), n_features))
+    for i, row in enumerate(rows):
+        X[i, list(row)] = 1
+    return X
+
+
+def compare(label, model_file, engine_dir, n_features, iterations):
+    import joblib
+
+    rng = np.random.default_rng(0)
+    singles = [[tuple(sorted(set(rng.integers(0, n_features, size=rng.integers(2, 6)).tolist())))] for _ in range(64)]
+    batches = [[row[0] for row in singles]]
+
+    model = joblib.load(model_file, mmap_mode='c')
+    engine = ForestEngine.load(engine_dir)
+    sklearn_call = lambda rows: model.predict_proba(dense_features(rows, n_features))
+    assert np.array_equal(sklearn_call(batches[0]), engine.predict_proba(batches[0]))
+
+    sklearn_private = private_kb('sklearn', model_file, n_features)
+    engine_private = private_kb('engine', engine_dir, n_features)
+
+    sklearn_call(singles[0]) # Warm up
+    engine.predict_proba(singles[0])
+    one = (per_call_ms(sklearn_call, singles, iterations), per_call_ms(engine.predict_proba, singles, iterations))
+    batch = (per_call_ms(sklearn_call, batches, max(1, iterations // 10)),
+             per_call_ms(engine.predict_proba, batches, max(1, iterations // 10)))
+
+    model_kb, engine_kb = os.path.getsize(model_file) / 1024, dir_size(engine_dir) / 1024
+    print(f"\n{label}: {len(engine.roots)} trees, {len(engine.feature)} nodes, {len(engine.leaf_ptr) - 1} leaves, "
+          f"{len(engine.classes_)} classes, {n_features} features")
+    print(f"  {'':<18} | {'scikit-learn':>12} | {'engine':>12} |")
+    print(f"  {'on disk KB':<18} | {model_kb:12.0f} | {engine_kb:12.0f} | {model_kb / engine_kb:.1f}x smaller")
+    print(f"  {'private memory KB':<18} | {sklearn_private:12.0f} | {engine_private:12.0f} |")
+    print(f"  {'1 row ms':<18} | {one[0]:12.3f} | {one[1]:12.3f} | {one[0] / one[1]:.1f}x faster")
+    print(f"  {'64 rows ms':<18} | {batch[0]:12.2f} | {batch[1]:12.2f} | {batch[0] / batch[1]:.1f}x faster")
+
+
+def synthetic_forest(directory, n_diseases, n_symptoms):
+    # The production forest's settings, fitted like train_model.py does on CSR features
+    from sklearn.ensemble import RandomForestClassifier
+    import joblib
+    from ml.synthetic import make_catalogue
+    from ml.train_model import preprocess_data
+
+    df = make_catalogue(n_diseases, n_symptoms)
+    X, y, all_symptoms = preprocess_data(df, sorted(df['disease'].unique()), 20, 42, feature_format='csr')
+    start = time.perf_counter()
+    model = RandomForestClassifier(n_estimators=100, max_depth=15, random_state=42).fit(X, y)
+    print(f"\nFitted a forest on {X.shape[0]} synthetic rows in {time.perf_counter() - start:.1f}s")
+    model_file = os.path.join(directory, 'random_forest.joblib')
+    joblib.dump(model, model_file)
+    save_forest(os.path.join(directory, 'random_forest'), export_forest(model))
+    return model_file, os.path.join(directory, 'random_forest'), len(all_symptoms)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1] != '--synthetic' else 200
+    warnings.simplefilter('ignore')
+
+    state = predictor._ensure_loaded()
+    entries = getattr(state.all_models, 'entries', {}) # Only split artifacts have engine directories
+    forests = [entry for entry in entries.values() if isinstance(state.engines.get(entry['name']), ForestEngine)]
+    if not forests:
+        print("No forest engines in the active split artifacts, retrain with ml/train_model.py first")
+    for entry in forests:
+        compare(f"Artifacts {state.version}, {entry['name']}", os.path.join(state.all_models.directory, entry['file']),
+                os.path.join(state.all_models.directory, entry['engine']), len(state.all_symptoms), iterations)
+
+    if '--synthetic' in sys.argv:
+        rest = sys.argv[sys.argv.index('--synthetic') + 1:]
+        n_diseases = int(rest[0]) if len(rest) > 0 else 1000
+        n_symptoms = int(rest[1]) if len(rest) > 1 else 5000
+        with tempfile.TemporaryDirectory() as directory:
+            model_file, engine_dir, n_features = synthetic_forest(directory, n_diseases, n_symptoms)
+            compare("Synthetic catalogue", model_file, engine_dir, n_features, iterations)
+
+
+if __name__ == "__main__":
+    main()
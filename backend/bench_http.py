@@ -0,0 +1,132 @@
+"""
+Bytes on the wire and latency for a typical chat session, with the HTTP
+compression/caching middleware (utils/http_cache.py) off and on.
+
+A logged-in user opens /chat (HTML plus its CSS/JS), the page loads
+/api/info, /api/symptoms and /api/chat/diagnoses, then the user enters three
+symptoms, gets a diagnosis and every message is saved. The same user then
+comes back and reloads the page. A small browser model honours Cache-Control
+(fresh entries are not requested at all) and revalidates with If-None-Match.
+Transfer time is estimated for a slow mobile link. Runs against a temporary
+database, from the backend folder:
+
+    python bench_http.py [bandwidth_kbps] [rtt_ms]
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+
+import database
+
+
+class Browser:
+    """Just enough of an HTTP cache to replay a page load the way a browser would."""
+
+    def __init__(self, client):
+        self.client = client
+        self.cache = {}
+        self.requests = 0
+        self.bytes = 0
+        self.server_ms = 0.0
+
+    def _fresh(self, entry):
+        control = entry['cache_control']
+        if 'no-cache' in control or 'no-store' in control:
+            return False
+        match = re.search(r'max-age=(\d+)', control)
+        return bool(match) and time.time() - entry['stored_at'] < int(match.group(1))
+
+    def request(self, method, url, json=None):
+        headers = {'Accept-Encoding': 'gzip, deflate, br'}
+        entry = self.cache.get(url) if method == 'GET' else None
+        if entry and self._fresh(entry):
+            return entry['body']
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+
+        start = time.perf_counter()
+        response = self.client.open(url, method=method, json=json, headers=headers)
+        self.server_ms += (time.perf_counter() - start) * 1000
+        self.requests += 1
+        self.bytes += len(response.data) + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+
+        if response.status_code == 304:
+            entry['stored_at'] = time.time()
+            return entry['body']
+        body = response.data
+        if response.headers.get('Content-Encoding') == 'gzip':
+            import gzip
+            body = gzip.decompress(body)
+        elif response.headers.get('Content-Encoding') == 'br':
+            import brotli
+            body = brotli.decompress(body)
+        control = response.headers.get('Cache-Control', '')
+        if method == 'GET' and 'no-store' not in control:
+            self.cache[url] = {'etag': response.headers.get('ETag'), 'cache_control': control,
+                               'body': body, 'stored_at': time.time()}
+        return body
+
+
+def page_load(browser):
+    html = browser.request('GET', '/chat').decode('utf-8')
+    for asset in re.findall(r'(?:href|src)="(/static/[^"]+)"', html):
+        browser.request('GET', asset)
+    browser.request('GET', '/api/info')
+    browser.request('GET', '/api/symptoms')
+    browser.request('GET', '/api/chat/diagnoses')
+
+
+def conversation(browser):
+    symptoms = ['fever', 'headache', 'vomiting']
+    for i, symptom in enumerate(symptoms):
+        browser.request('POST', '/api/chat/message', {'sender': 'user', 'message': symptom})
+        browser.request('POST', '/api/validate', {'text': symptom, 'lang': 'en'})
+        browser.request('POST', '/api/chat/message', {'sender': 'bot', 'message': f"Noted <b>{symptom}</b> ({i + 1}/3)."})
+    browser.request('POST', '/api/predict', {'symptoms': symptoms})
+    browser.request('POST', '/api/chat/message', {'sender': 'bot', 'message': 'diagnosis card'})
+
+
+def run(app, user_id, enabled):
+    app.config['HTTP_CACHE_ENABLED'] = enabled
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    browser = Browser(client)
+    page_load(browser)
+    conversation(browser)
+    first = (browser.requests, browser.bytes, browser.server_ms)
+    page_load(browser) # Coming back later the same day
+    return first, (browser.requests - first[0], browser.bytes - first[1], browser.server_ms - first[2])
+
+
+def main():
+    bandwidth = (float(sys.argv[1]) if len(sys.argv) > 1 else 250.0) * 1000 / 8 # bytes/s
+    rtt = (float(sys.argv[2]) if len(sys.argv) > 2 else 300.0) / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'bench.db')
+        from app import app
+        database.create_user('Bench User', 'bench@example.com', 'password')
+        user_id = database.get_user_by_email('bench@example.com')['id']
+        run(app, user_id, True) # Warm up the model and caches
+        results = {'off': run(app, user_id, False), 'on': run(app, user_id, True)}
+        database.close_thread_connections()
+
+    print(f"Link model: {bandwidth * 8 / 1000:.0f} kbps, {rtt * 1000:.0f} ms RTT (wire estimate = requests x RTT + bytes / bandwidth)")
+    print(f"{'Phase':<13} | {'middleware':>10} | {'requests':>8} | {'bytes':>8} | {'server ms':>9} | {'wire est. s':>11}")
+    print("-" * 76)
+    for index, phase in enumerate(('first visit', 'repeat visit')):
+        for mode in ('off', 'on'):
+            requests, sent, server_ms = results[mode][index]
+            wire = requests * rtt + sent / bandwidth
+            print(f"{phase:<13} | {mode:>10} | {requests:8d} | {sent:8d} | {server_ms:9.1f} | {wire:11.2f}")
+    for index, phase in enumerate(('first visit', 'repeat visit')):
+        off, on = results['off'][index][1], results['on'][index][1]
+        print(f"{phase}: {100 * (1 - on / off):.0f}% fewer bytes")
+
+
+if __name__ == "__main__":
+    main()
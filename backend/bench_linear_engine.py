@@ -0,0 +1,91 @@
+"""
+Latency of the NumPy engines (ml/linear_engine.py) against scikit-learn's
+predict_proba for the Naive Bayes, Logistic Regression and linear SVM models
+of the active artifacts, for one patient and for a batch of 64. The
+scikit-learn timings include building the feature matrix, which the engines
+skip. Also times DiseasePredictor.predict with an empty prediction cache, with
+the engines on and off, and checks that scoring with an engine alone never
+imports scikit-learn. Run from the backend folder after training:
+
+    python bench_linear_engine.py [iterations]
+"""
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from ml.linear_engine import LinearEngine
+from ml.predictor import ArtifactSet, predictor
+
+SYMPTOM_SETS = [
+    ["fever", "headache", "chills"],
+    ["cough", "sneezing", "runny nose"],
+    ["itching", "skin rash"],
+    ["vomiting", "diarrhea", "abdominal pain"],
+]
+
+IMPORT_CHECK = """
+import sys
+from ml.linear_engine import LinearEngine
+engine = LinearEngine.load(sys.argv[1])
+engine.predict_proba([(0, 3, 7)])
+print('sklearn' in sys.modules)
+"""
+
+
+def per_call_ms(fn, calls, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(calls[i % len(calls)])
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    warnings.simplefilter('ignore')
+    state = predictor._ensure_loaded()
+    engines = {name: engine for name, engine in state.engines.items() if isinstance(engine, LinearEngine)}
+    if not engines:
+        print("No engines in the active artifacts, retrain with ml/train_model.py first")
+        return
+    rng = np.random.default_rng(0)
+    n_features = len(state.all_symptoms)
+    singles = [[tuple(sorted(set(rng.integers(0, n_features, size=rng.integers(2, 6)).tolist())))] for _ in range(64)]
+    batches = [[row[0] for row in singles]]
+
+    print(f"Artifacts {state.version}: {n_features} symptoms, {len(next(iter(engines.values())).classes_)} diseases")
+    print(f"{'model':<20} | {'sklearn 1 row ms':>16} | {'engine 1 row ms':>15} | {'sklearn 64 ms':>13} | {'engine 64 ms':>12}")
+    print("-" * 90)
+    for name, engine in engines.items():
+        model = state.all_models[name]
+        sklearn_call = lambda rows: model.predict_proba(state.features(rows))
+        sklearn_call(singles[0]) # Warm up
+        engine.predict_proba(singles[0])
+        one = (per_call_ms(sklearn_call, singles, iterations), per_call_ms(engine.predict_proba, singles, iterations))
+        batch = (per_call_ms(sklearn_call, batches, max(1, iterations // 10)),
+                 per_call_ms(engine.predict_proba, batches, max(1, iterations // 10)))
+        print(f"{name:<20} | {one[0]:16.3f} | {one[1]:15.3f} | {batch[0]:13.2f} | {batch[1]:12.2f} "
+              f"({one[0] / one[1]:.1f}x / {batch[0] / batch[1]:.1f}x)")
+
+    print("\nDiseasePredictor.predict, prediction cache cleared before every call:")
+    for use_engines in (False, True):
+        predictor._state = ArtifactSet(predictor.model_path, predictor.artifacts_dir, predictor.data_dir, use_engines).load()
+        predictor.predict(SYMPTOM_SETS[0])
+
+        def uncached(symptoms):
+            predictor.prediction_cache.clear()
+            return predictor.predict(symptoms)
+        print(f"  engines {'on ' if use_engines else 'off'}: {per_call_ms(uncached, SYMPTOM_SETS, iterations // 3):.2f} ms")
+
+    engine_file = next(e['engine'] for e in predictor._state.all_models.entries.values() if str(e.get('engine', '')).endswith('.npz'))
+    path = os.path.join(predictor._state.all_models.directory, engine_file)
+    imported = subprocess.run([sys.executable, '-c', IMPORT_CHECK, path], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    print(f"\nscikit-learn imported when scoring with an engine alone: {imported}")
+
+
+if __name__ == "__main__":
+    main()
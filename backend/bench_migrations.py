@@ -0,0 +1,94 @@
+"""
+Query latency before and after the index migrations.
+
+Seeds a temporary database at schema version 1 (the original tables, no
+secondary indexes) with users, sessions and messages, times the chat
+history queries, then runs the remaining migrations and times them again.
+Run from the backend folder:
+
+    python bench_migrations.py [messages] [users] [lookups]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import database
+
+QUERIES = [
+    ('get_messages_by_user', lambda rng, users, sessions: database.get_messages_by_user(rng.randint(1, users))),
+    ('get_chat_history', lambda rng, users, sessions: database.get_chat_history(rng.randint(1, users))),
+    ('get_session_messages', lambda rng, users, sessions: database.get_session_messages(rng.choice(sessions))),
+    ('get_user_sessions', lambda rng, users, sessions: database.get_user_sessions(rng.randint(1, users))),
+]
+
+
+def seed(conn, messages, users, sessions_per_user=20, seed_value=11):
+    rng = random.Random(seed_value)
+    conn.execute('BEGIN')
+    conn.executemany('INSERT INTO users (id, name, email, password) VALUES (?, ?, ?, ?)',
+                     ((i, f"User {i}", f"user{i}@example.com", 'x') for i in range(1, users + 1)))
+    sessions = [(f"s-{u}-{k}", u) for u in range(1, users + 1) for k in range(sessions_per_user)]
+    conn.executemany("INSERT INTO sessions (id, user_id, title, created_at) VALUES (?, ?, ?, datetime('now', ?))",
+                     ((sid, uid, sid, f"-{rng.randint(0, 10 ** 6)} seconds") for sid, uid in sessions))
+
+    def rows():
+        for i in range(messages):
+            sid, uid = sessions[rng.randrange(len(sessions))]
+            yield (uid, sid, 'user' if i % 2 else 'bot', f"message {i}", f"-{rng.randint(0, 10 ** 7)} seconds")
+
+    conn.executemany("INSERT INTO messages (user_id, session_id, sender, message, timestamp) "
+                     "VALUES (?, ?, ?, ?, datetime('now', ?))", rows())
+    conn.commit()
+    return [sid for sid, _ in sessions]
+
+
+def time_queries(users, sessions, lookups):
+    results = {}
+    for name, query in QUERIES:
+        rng = random.Random(5)
+        latencies = []
+        for _ in range(lookups):
+            start = time.perf_counter()
+            query(rng, users, sessions)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        results[name] = (latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95) - 1] * 1000)
+    return results
+
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    lookups = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    original_path = database.DB_PATH
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'bench.db')
+        conn = database.get_db_connection()
+        database.migrate(conn, target=1)
+        start = time.perf_counter()
+        sessions = seed(conn, messages, users)
+        print(f"Seeded {messages} messages for {users} users in {time.perf_counter() - start:.1f}s")
+
+        before = time_queries(users, sessions, lookups)
+        start = time.perf_counter()
+        database.migrate(conn)
+        migrate_s = time.perf_counter() - start
+        conn.close()
+        database.close_thread_connections() # Pick up the rebuilt schema
+        after = time_queries(users, sessions, lookups)
+        database.close_thread_connections()
+        database.DB_PATH = original_path
+
+    print(f"Migrations 2..{database.SCHEMA_VERSION} took {migrate_s:.1f}s")
+    print(f"{'Query':<22} | {'v1 p50 ms':>10} | {'v1 p95 ms':>10} | {'new p50 ms':>10} | {'new p95 ms':>10} | {'speedup':>7}")
+    print("-" * 84)
+    for name, _ in QUERIES:
+        b, a = before[name], after[name]
+        print(f"{name:<22} | {b[0]:10.2f} | {b[1]:10.2f} | {a[0]:10.2f} | {a[1]:10.2f} | {b[0] / a[0]:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
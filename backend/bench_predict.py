@@ -0,0 +1,87 @@
+"""
+Benchmark for DiseasePredictor.predict.
+
+Compares the old per-request path (index rebuilt on every call, list feature
+vector, predict() + predict_proba() per model) against the current
+single-pass inference. Run from the backend folder after training:
+
+    python bench_predict.py [iterations]
+"""
+import sys
+import time
+import statistics
+
+from ml.predictor import predictor
+
+SYMPTOM_SETS = [
+    ["fever", "headache", "chills"],
+    ["cough", "sneezing", "runny nose"],
+    ["itching", "skin rash"],
+    ["vomiting", "diarrhea", "abdominal pain"],
+]
+
+
+def legacy_predict(symptoms_list):
+    # Mirror of the pre-optimisation hot path (without response formatting)
+    vector = [0] * len(predictor.all_symptoms)
+    symptom_to_index = {str(s).lower().strip(): i for i, s in enumerate(predictor.all_symptoms)}
+    for s in symptoms_list:
+        s_clean = str(s).lower().strip()
+        if s_clean in symptom_to_index:
+            vector[symptom_to_index[s_clean]] = 1
+    results = []
+    for name, model in predictor.all_models.items():
+        pred = model.predict([vector])[0]
+        p = model.predict_proba([vector])[0]
+        results.append((name, pred, float(max(p)) * 100))
+    return results
+
+
+def current_predict(symptoms_list):
+    state = predictor._ensure_loaded()
+    row, _ = state.vectorize(symptoms_list)
+    return state.run_models([row])
+
+
+def predict_uncached(symptoms_list):
+    predictor.prediction_cache.clear()
+    return predictor.predict(symptoms_list)
+
+
+def timed(fn, iterations):
+    samples = []
+    for i in range(iterations):
+        symptoms = SYMPTOM_SETS[i % len(SYMPTOM_SETS)]
+        start = time.perf_counter()
+        fn(symptoms)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    predictor._ensure_loaded()
+    print(f"Models: {', '.join(predictor.all_models)}")
+    print(f"Symptoms: {len(predictor.all_symptoms)}, iterations: {iterations}")
+
+    # Warm up both paths
+    legacy_predict(SYMPTOM_SETS[0])
+    current_predict(SYMPTOM_SETS[0])
+
+    legacy_mean, legacy_p99 = timed(legacy_predict, iterations)
+    current_mean, current_p99 = timed(current_predict, iterations)
+    cold_mean, cold_p99 = timed(predict_uncached, iterations)
+    full_mean, full_p99 = timed(predictor.predict, iterations)
+
+    print(f"{'Path':<28} | {'mean ms':>8} | {'p99 ms':>8}")
+    print("-" * 52)
+    print(f"{'legacy (predict+proba)':<28} | {legacy_mean:8.2f} | {legacy_p99:8.2f}")
+    print(f"{'single-pass inference':<28} | {current_mean:8.2f} | {current_p99:8.2f}")
+    print(f"{'predict() cache cold':<28} | {cold_mean:8.2f} | {cold_p99:8.2f}")
+    print(f"{'predict() cache warm':<28} | {full_mean:8.2f} | {full_p99:8.2f}")
+    print(f"Speedup (inference): {legacy_mean / current_mean:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
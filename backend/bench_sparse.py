@@ -0,0 +1,117 @@
+"""
+Dense vs CSR features for training and inference, from the real catalogue up
+to synthetic ones with thousands of diseases and 20k symptoms (ml/synthetic.py).
+
+For each catalogue: training matrix size and augmentation time, fit time per
+model on dense and CSR input, and predict_proba latency of the CSR-trained
+model for one patient and for a batch of 64, fed CSR or dense rows built the
+way ArtifactSet.features() builds them. Dense fits are skipped when the
+float64 matrix sklearn works on would exceed the limit.
+Run from the backend folder:
+
+    python bench_sparse.py [dense_limit_mb]
+"""
+import sys
+import time
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.tree import DecisionTreeClassifier
+
+from ml import synthetic, train_model
+from ml.predictor import ArtifactSet
+
+CATALOGUES = [
+    # (label, n_diseases, n_symptoms, samples_per_disease); None = the real data
+    ('real', None, None, 50),
+    ('1k x 5k', 1000, 5000, 10),
+    ('4k x 20k', 4000, 20000, 10),
+]
+
+
+def build_models():
+    return {
+        'Naive Bayes': MultinomialNB(),
+        'Logistic Regression': LogisticRegression(max_iter=200),
+        'Decision Tree': DecisionTreeClassifier(max_depth=10, min_samples_leaf=5, random_state=42),
+    }
+
+
+def matrix_bytes(X):
+    if hasattr(X, 'indptr'):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def timed(fn, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def query_rows(X, n, seed=0):
+    # Real-looking queries: symptom index tuples of training rows with 2-5 symptoms
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, X.shape[0], size=n)
+    return [tuple(np.flatnonzero(X[i].toarray() if hasattr(X, 'indptr') else X[i])[:5].tolist()) for i in picks]
+
+
+def predict_ms(model, state, rows, batch):
+    # Mean ms per predict_proba call, feature matrix construction included
+    calls = [rows[i:i + batch] for i in range(0, len(rows), batch)]
+    start = time.perf_counter()
+    for chunk in calls:
+        model.predict_proba(state.features(chunk))
+    return (time.perf_counter() - start) / len(calls) * 1000
+
+
+def main():
+    dense_limit = (float(sys.argv[1]) if len(sys.argv) > 1 else 1024) * 1024 * 1024
+
+    for label, n_diseases, n_symptoms, samples in CATALOGUES:
+        if n_diseases is None:
+            df, _ = train_model.load_data()
+        else:
+            df = synthetic.make_catalogue(n_diseases, n_symptoms)
+        (X_csr, y, all_symptoms), csr_seconds = timed(
+            train_model.preprocess_data, df, None, samples, train_model.SEED, 'csr')
+        n_classes = df['disease'].nunique()
+        dense_float_bytes = X_csr.shape[0] * X_csr.shape[1] * 8
+        X_dense = None
+
+        print(f"\n== {label}: {n_classes} diseases, {len(all_symptoms)} symptoms, {X_csr.shape[0]} samples, "
+              f"{X_csr.nnz / X_csr.shape[0]:.1f} symptoms/row ==")
+        if dense_float_bytes <= dense_limit:
+            (X_dense, _, _), dense_seconds = timed(
+                train_model.preprocess_data, df, None, samples, train_model.SEED, 'dense')
+            print(f"training matrix: dense {matrix_bytes(X_dense) / 1e6:.1f} MB uint8, {dense_float_bytes / 1e6:.0f} MB "
+                  f"as float64 ({dense_seconds:.2f}s) | csr {matrix_bytes(X_csr) / 1e6:.2f} MB ({csr_seconds:.2f}s)")
+        else:
+            print(f"training matrix: csr {matrix_bytes(X_csr) / 1e6:.2f} MB ({csr_seconds:.2f}s) | dense skipped, "
+                  f"{dense_float_bytes / 1e9:.1f} GB as float64")
+
+        states = {}
+        for fmt in ('csr', 'dense'):
+            states[fmt] = ArtifactSet(None, None, None)
+            states[fmt].all_symptoms = all_symptoms
+            states[fmt].feature_format = fmt
+        rows = query_rows(X_csr, 128)
+
+        print(f"{'model':<20} | {'fit dense s':>11} | {'fit csr s':>9} | {'csr 1/64 rows ms':>17} | {'dense 1/64 rows ms':>18}")
+        print("-" * 88)
+        for name, model in build_models().items():
+            if name == 'Logistic Regression' and n_classes * len(all_symptoms) > 20000000:
+                print(f"{name:<20} | skipped: {n_classes} x {len(all_symptoms)} weights take too long to fit here")
+                continue
+            fit_dense = f"{timed(model.fit, X_dense, y)[1]:11.2f}" if X_dense is not None else f"{'-':>11}"
+            _, fit_csr = timed(model.fit, X_csr, y) # Inference below uses the CSR-trained model
+            latency = {fmt: (predict_ms(model, state, rows, 1), predict_ms(model, state, rows, 64))
+                       for fmt, state in states.items()}
+            print(f"{name:<20} | {fit_dense} | {fit_csr:9.2f} | "
+                  f"{latency['csr'][0]:7.2f} / {latency['csr'][1]:7.2f} | {latency['dense'][0]:8.2f} / {latency['dense'][1]:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
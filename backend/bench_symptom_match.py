@@ -0,0 +1,98 @@
+"""
+Benchmark for fuzzy symptom matching.
+
+Compares the linear fuzzywuzzy extractOne scan against the n-gram indexed
+SymptomMatcher on the bundled disease_symptoms.csv vocabulary and on a
+synthetic vocabulary (50k symptoms by default). Also reports how often both
+paths agree on (match, score). Run from the backend folder:
+
+    python bench_symptom_match.py [synthetic_size]
+"""
+import csv
+import os
+import random
+import sys
+import time
+
+from fuzzywuzzy import process
+
+from ml.symptom_index import SymptomMatcher
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'ml', 'data')
+
+BODY_PARTS = ["head", "chest", "back", "joint", "muscle", "stomach", "throat", "eye", "ear", "skin",
+              "knee", "neck", "abdomen", "leg", "arm", "foot", "hand", "shoulder", "tooth", "nose"]
+QUALIFIERS = ["pain", "swelling", "itching", "burning", "stiffness", "numbness", "rash", "bleeding",
+              "weakness", "discharge", "redness", "cramps", "tingling", "soreness", "dryness"]
+MODIFIERS = ["acute", "chronic", "mild", "severe", "sudden", "recurring", "persistent", "night",
+             "morning", "left", "right", "upper", "lower", "sharp", "dull"]
+
+
+def load_bundled_vocab():
+    symptoms = set()
+    with open(os.path.join(DATA_DIR, 'disease_symptoms.csv'), 'r', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            if row.get('symptom'):
+                symptoms.add(row['symptom'].strip())
+    return sorted(symptoms)
+
+
+def synthetic_vocab(size, seed=7):
+    rng = random.Random(seed)
+    vocab = set()
+    while len(vocab) < size:
+        words = [rng.choice(MODIFIERS), rng.choice(BODY_PARTS), rng.choice(QUALIFIERS)]
+        if rng.random() < 0.5:
+            words.append(f"type {rng.randint(1, 999)}")
+        vocab.add(" ".join(words))
+    return sorted(vocab)
+
+
+def make_queries(vocab, count, seed=11):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        word = list(rng.choice(vocab))
+        # Introduce a typo in about half the queries
+        if rng.random() < 0.5 and len(word) > 3:
+            i = rng.randrange(len(word))
+            word[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        queries.append("".join(word))
+    queries += ["fevr", "head ache", "stomach pain", "runny nose", "xyzzy"]
+    return queries
+
+
+def run(label, vocab, queries):
+    build_start = time.perf_counter()
+    matcher = SymptomMatcher(vocab)
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    start = time.perf_counter()
+    linear = [process.extractOne(q, vocab) for q in queries]
+    linear_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    start = time.perf_counter()
+    indexed = [matcher.extract_one(q) for q in queries]
+    indexed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    agree = sum(1 for a, b in zip(linear, indexed) if tuple(a) == tuple(b))
+    same_score = sum(1 for a, b in zip(linear, indexed) if a[1] == b[1])
+    print(f"{label:<12} | {len(vocab):>7} | {build_ms:9.1f} | {linear_ms:9.3f} | {indexed_ms:9.3f} | "
+          f"{linear_ms / indexed_ms:7.1f}x | {agree}/{len(queries)} ({same_score} same score)")
+
+
+def main():
+    synthetic_size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print(f"{'Vocabulary':<12} | {'size':>7} | {'build ms':>9} | {'linear ms':>9} | {'index ms':>9} | "
+          f"{'speedup':>8} | agreement")
+    print("-" * 96)
+
+    bundled = load_bundled_vocab()
+    run("bundled", bundled, make_queries(bundled, 200))
+
+    synthetic = synthetic_vocab(synthetic_size)
+    run("synthetic", synthetic, make_queries(synthetic, 20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Training pipeline timings (ml/train_model.py):
+  - augmentation: the old per-symptom Python loop vs the vectorized, seeded
+    mask sampling, on the real catalogue and on larger ones made by repeating
+    it under new disease names
+  - model fits: one after another vs the process pool
+Run from the backend folder:
+
+    python bench_training.py [catalogue_multipliers] [workers]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ml import train_model
+
+
+def loop_preprocess(df_symptoms, samples_per_disease=50):
+    # The augmentation as it was before vectorizing, kept here as the baseline
+    disease_symptom_map = df_symptoms.groupby('disease')['symptom'].apply(list).to_dict()
+    all_symptoms = sorted(df_symptoms['symptom'].unique())
+    symptom_to_index = {symptom: i for i, symptom in enumerate(all_symptoms)}
+    X, y = [], []
+    for disease, symptoms in disease_symptom_map.items():
+        base_vector = [0] * len(all_symptoms)
+        for s in symptoms:
+            base_vector[symptom_to_index[s]] = 1
+        X.append(base_vector)
+        y.append(disease)
+        if len(symptoms) > 1:
+            for _ in range(samples_per_disease):
+                keep_prob = np.random.uniform(0.5, 0.9)
+                aug_vector = [0] * len(all_symptoms)
+                for s in symptoms:
+                    if np.random.rand() < keep_prob:
+                        aug_vector[symptom_to_index[s]] = 1
+                if sum(aug_vector) > 0:
+                    X.append(aug_vector)
+                    y.append(disease)
+    return np.array(X), np.array(y), all_symptoms
+
+
+def scaled(df_symptoms, factor):
+    # factor x the diseases (each a renamed copy), symptoms shared as in real catalogues
+    copies = [df_symptoms.assign(disease=df_symptoms['disease'] + f" #{i}") for i in range(factor)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    factors = [int(n) for n in sys.argv[1].split(',')] if len(sys.argv) > 1 else [1, 10, 50]
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else min(5, os.cpu_count() or 1)
+    df_symptoms, all_diseases = train_model.load_data()
+
+    print(f"{'diseases':>8} | {'samples':>8} | {'loop s':>8} | {'vectorized s':>12} | {'speedup':>7}")
+    print("-" * 56)
+    for factor in factors:
+        df = scaled(df_symptoms, factor)
+        np.random.seed(0)
+        _, loop_seconds = timed(loop_preprocess, df)
+        (X, _, _), vector_seconds = timed(train_model.preprocess_data, df, None)
+        print(f"{df['disease'].nunique():8d} | {len(X):8d} | {loop_seconds:8.3f} | {vector_seconds:12.4f} | {loop_seconds / vector_seconds:6.0f}x")
+
+    X1, _, _ = train_model.preprocess_data(df_symptoms, all_diseases, seed=7)
+    X2, _, _ = train_model.preprocess_data(df_symptoms, all_diseases, seed=7)
+    print(f"Same seed, same samples: {np.array_equal(X1, X2)}")
+
+    X, y, _ = train_model.preprocess_data(df_symptoms, all_diseases)
+    print(f"\nModel fits on {len(X)} samples ({os.cpu_count()} CPUs):")
+    _, serial = timed(train_model.train_and_evaluate, X, y, workers=1)
+    _, parallel = timed(train_model.train_and_evaluate, X, y, workers=workers)
+    print(f"serial {serial:.2f}s, pool of {workers} {parallel:.2f}s ({serial / parallel:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark for the translation cache.
+
+Replays a skewed stream of Hindi/Tamil phrases through TranslationCache using
+the offline DictionaryTranslator with a simulated network delay, and compares
+it with calling the backend directly on every request (the old behaviour).
+Run from the backend folder:
+
+    python bench_translation.py [requests] [delay_ms]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+from ml.translation import DictionaryTranslator, TranslationCache
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'ml', 'data')
+
+
+def load_rows():
+    with open(os.path.join(DATA_DIR, 'symptom_aliases.csv'), 'r', encoding='utf-8-sig') as f:
+        return [(r['alias'], r['symptom'], r['language']) for r in csv.DictReader(f)]
+
+
+def workload(rows, count, seed=3):
+    # A handful of common phrases dominate real traffic (Zipf-like skew)
+    phrases = [alias for alias, _, lang in rows if lang != 'en']
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(phrases))]
+    return rng.choices(phrases, weights=weights, k=count)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+    rows = load_rows()
+    stream = workload(rows, count)
+
+    backend = DictionaryTranslator.from_aliases(rows, delay=delay)
+    start = time.perf_counter()
+    for text in stream:
+        backend.translate(text)
+    direct_ms = (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'translations.db')
+        backend = DictionaryTranslator.from_aliases(rows, delay=delay)
+        cache = TranslationCache(backend, db_path=db_path, memory_size=256)
+        start = time.perf_counter()
+        for text in stream:
+            cache.translate(text)
+        cached_ms = (time.perf_counter() - start) * 1000
+        stats = cache.stats()
+
+        # A second worker process starts with a cold memory tier but a warm SQLite table
+        worker = TranslationCache(DictionaryTranslator.from_aliases(rows, delay=delay), db_path=db_path)
+        start = time.perf_counter()
+        for text in stream:
+            worker.translate(text)
+        worker_ms = (time.perf_counter() - start) * 1000
+        worker_stats = worker.stats()
+
+    print(f"Requests: {count}, distinct phrases: {len(set(stream))}, simulated delay: {delay * 1000:.1f}ms")
+    print(f"{'Path':<26} | {'total ms':>10} | {'per req ms':>10} | backend calls")
+    print("-" * 66)
+    print(f"{'direct (no cache)':<26} | {direct_ms:10.1f} | {direct_ms / count:10.3f} | {count}")
+    print(f"{'two-tier cache':<26} | {cached_ms:10.1f} | {cached_ms / count:10.3f} | {stats['misses']}")
+    print(f"{'second worker (disk warm)':<26} | {worker_ms:10.1f} | {worker_ms / count:10.3f} | {worker_stats['misses']}")
+    print(f"Cache stats: memory_hits={stats['memory_hits']} disk_hits={stats['disk_hits']} "
+          f"misses={stats['misses']} hit_rate={stats['hit_rate']}")
+    print(f"Second worker: memory_hits={worker_stats['memory_hits']} disk_hits={worker_stats['disk_hits']} "
+          f"misses={worker_stats['misses']}")
+
+
+if __name__ == "__main__":
+    main()
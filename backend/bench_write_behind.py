@@ -0,0 +1,103 @@
+"""
+Chat message write throughput: one commit per message vs the write-behind queue.
+
+Several threads (standing in for concurrent /api/chat/message requests) each
+save a run of messages. Modes:
+  - direct:       save_chat_message commits every message itself
+  - ack=flush:    write-behind, each call waits for its batch to commit
+  - ack=none:     write-behind, calls return once queued (drain time included)
+Each mode uses its own temporary database. Run from the backend folder:
+
+    python bench_write_behind.py [threads] [messages_per_thread] [synchronous]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import database
+
+
+def setup(path):
+    database.DB_PATH = path
+    database.clear_user_cache() # Ids repeat across the temporary databases
+    database.init_db()
+    for i in range(20):
+        database.create_user(f"User {i}", f"user{i}@example.com", "password")
+
+
+def run(threads, per_thread):
+    errors = []
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(n):
+        local = []
+        for i in range(per_thread):
+            start = time.perf_counter()
+            try:
+                database.save_chat_message(n % 20 + 1, 'user' if i % 2 else 'bot', f"message {n}-{i}")
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            local.append(time.perf_counter() - start)
+        database.close_thread_connections()
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    database.disable_write_behind() # Waits for anything still queued
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'msgs_per_sec': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': len(errors)
+    }
+
+
+def count_messages():
+    with database._connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    database.SYNCHRONOUS = sys.argv[3] if len(sys.argv) > 3 else database.SYNCHRONOUS
+    original_path = database.DB_PATH
+    results = {}
+    batches = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('direct', 'flush', 'none'):
+            setup(os.path.join(tmp, f'{mode}.db'))
+            if mode != 'direct':
+                write_queue = database.enable_write_behind(ack=mode)
+            results[mode] = run(threads, per_thread)
+            if mode != 'direct':
+                batches[mode] = write_queue.stats()
+            stored = count_messages()
+            database.close_thread_connections()
+            assert stored == threads * per_thread, f"{mode}: stored {stored} messages"
+    database.DB_PATH = original_path
+
+    print(f"Threads: {threads}, messages/thread: {per_thread}, synchronous={database.SYNCHRONOUS}")
+    print(f"{'Mode':<10} | {'msgs/s':>9} | {'p50 ms':>8} | {'p99 ms':>8} | {'errors':>6} | avg batch")
+    print("-" * 64)
+    for mode, r in results.items():
+        avg = batches[mode]['avg_batch'] if mode in batches else 1
+        print(f"{mode:<10} | {r['msgs_per_sec']:9.0f} | {r['p50_ms']:8.3f} | {r['p99_ms']:8.3f} | {r['errors']:6d} | {avg}")
+    for mode in ('flush', 'none'):
+        print(f"Throughput gain (ack={mode}): {results[mode]['msgs_per_sec'] / results['direct']['msgs_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
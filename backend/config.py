@@ -2,4 +2,60 @@ import os
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
+    # Upper bound on symptom sets accepted by /api/predict/batch
+    MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 500))
+    # Entries in the in-process prediction cache (0 disables it)
+    PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+    # Translation cache (in-process LRU in front of a SQLite table shared by all workers)
+    # TRANSLATOR_BACKEND: 'google' (online) or 'dictionary' (offline, built from symptom_aliases.csv)
+    TRANSLATOR_BACKEND = os.environ.get('TRANSLATOR_BACKEND', 'google')
+    TRANSLATION_CACHE_PATH = os.environ.get('TRANSLATION_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'translation_cache.db'))
+    TRANSLATION_CACHE_SIZE = int(os.environ.get('TRANSLATION_CACHE_SIZE', 2048))
+    TRANSLATION_CACHE_TTL = int(os.environ.get('TRANSLATION_CACHE_TTL', 30 * 24 * 3600))
+    TRANSLATION_CACHE_MAX_ROWS = int(os.environ.get('TRANSLATION_CACHE_MAX_ROWS', 50000))
+    # Model hot reload: token for POST /api/admin/reload (endpoint disabled when unset)
+    # and how often (seconds) every worker polls ml/artifacts/CURRENT for a new version.
+    # The endpoint only reloads the worker that served it; the others follow CURRENT
+    # through this watcher, so 0 (off) leaves them on the old version until restarted.
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 5))
+    # Page sizes for history, session and message listings (?limit=, capped)
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 500))
+    # Write-behind for chat messages: queued and committed in batches by a writer thread.
+    # CHAT_WRITE_ACK 'flush' waits for the commit, 'none' returns once queued (faster, may lose
+    # queued messages on a crash). Batches flush at CHAT_BATCH_SIZE or CHAT_FLUSH_INTERVAL seconds.
+    CHAT_WRITE_BEHIND = os.environ.get('CHAT_WRITE_BEHIND', '0').lower() in ('1', 'true', 'yes')
+    CHAT_WRITE_ACK = os.environ.get('CHAT_WRITE_ACK', 'flush')
+    CHAT_QUEUE_SIZE = int(os.environ.get('CHAT_QUEUE_SIZE', 10000))
+    CHAT_BATCH_SIZE = int(os.environ.get('CHAT_BATCH_SIZE', 200))
+    CHAT_FLUSH_INTERVAL = float(os.environ.get('CHAT_FLUSH_INTERVAL', 0.02))
+    # Browser cache lifetime (seconds) for /api/symptoms; it's revalidated with its ETag afterwards
+    SYMPTOMS_MAX_AGE = int(os.environ.get('SYMPTOMS_MAX_AGE', 3600))
+    # Response compression and Cache-Control policies (utils/http_cache.py)
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    HTTP_COMPRESS_MIN_SIZE = int(os.environ.get('HTTP_COMPRESS_MIN_SIZE', 500))
+    # Rendered PDF reports: in-memory cache size, plus an optional on-disk tier shared by workers
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR') # e.g. backend/report_cache; unset = memory only
+    REPORT_CACHE_DISK_MAX_BYTES = int(os.environ.get('REPORT_CACHE_DISK_MAX_BYTES', 256 * 1024 * 1024))
+    # Background report rendering (/api/report/jobs): pool size, queue bound, where job files live
+    REPORT_JOB_EXECUTOR = os.environ.get('REPORT_JOB_EXECUTOR', 'process') # or 'thread'
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+    REPORT_JOB_MAX_PENDING = int(os.environ.get('REPORT_JOB_MAX_PENDING', 32))
+    REPORT_JOB_TTL = int(os.environ.get('REPORT_JOB_TTL', 3600))
+    REPORT_JOBS_DIR = os.environ.get('REPORT_JOBS_DIR', os.path.join(os.path.dirname(__file__), 'report_jobs'))
+    # Score LR / Naive Bayes / linear SVM and the tree models with the exported NumPy engines instead of scikit-learn
+    NUMPY_ENGINES = os.environ.get('NUMPY_ENGINES', '1').lower() in ('1', 'true', 'yes')
+    # Ensemble execution plan for /api/predict: models run in ENSEMBLE_PLAN order (cheapest first;
+    # unlisted models run last) and stop early, after at least ENSEMBLE_MIN_MODELS, once one of them
+    # reaches ENSEMBLE_CONFIDENCE percent, ENSEMBLE_AGREEMENT of them name the same disease, or
+    # ENSEMBLE_BUDGET_MS has passed (0 disables a rule). Requests with full_comparison run them all.
+    ENSEMBLE_EARLY_EXIT = os.environ.get('ENSEMBLE_EARLY_EXIT', '1').lower() in ('1', 'true', 'yes')
+    ENSEMBLE_PLAN = [name.strip() for name in os.environ.get(
+        'ENSEMBLE_PLAN', 'Logistic Regression,Naive Bayes,Decision Tree,SVM,Random Forest').split(',') if name.strip()]
+    ENSEMBLE_MIN_MODELS = int(os.environ.get('ENSEMBLE_MIN_MODELS', 2))
+    ENSEMBLE_CONFIDENCE = float(os.environ.get('ENSEMBLE_CONFIDENCE', 90))
+    ENSEMBLE_AGREEMENT = int(os.environ.get('ENSEMBLE_AGREEMENT', 3))
+    ENSEMBLE_BUDGET_MS = float(os.environ.get('ENSEMBLE_BUDGET_MS', 25))
     # Add other config vars here (DB, OAuth, etc.)
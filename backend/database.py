@@ -1,22 +1,78 @@
 import sqlite3
 import os
 import uuid # Added uuid import
+import threading
+import queue
+from contextlib import contextmanager
+from utils.cache import LRUCache
 from werkzeug.security import generate_password_hash, check_password_hash
 import datetime
+import base64
+import html
+import json
+import re
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'database.db')
 
+# Connection tuning
+BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+STATEMENT_CACHE_SIZE = 256 # Prepared statements kept per connection
+SYNCHRONOUS = os.environ.get('DB_SYNCHRONOUS', 'NORMAL') # NORMAL is durable across app crashes in WAL mode
+
+# User records looked up by Flask-Login on every request. The TTL bounds how stale
+# another worker's copy can get after a write (invalidation is per process).
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 300))
+
+_local = threading.local()
+_user_cache = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+    # New, fully configured connection; the caller owns it and must close it
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={SYNCHRONOUS}')
+    conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    # SQLite ignores REFERENCES / ON DELETE CASCADE unless this is on, per connection
+    conn.execute('PRAGMA foreign_keys=ON')
     return conn
 
-def init_db():
-    conn = get_db_connection()
-    c = conn.cursor()
-    
-    # Create Users Table
-    c.execute('''
+def _pooled_connection():
+    # One long-lived connection per thread (and per process, so forked workers never share one).
+    # Reusing it keeps sqlite3's prepared statement cache warm across calls.
+    if getattr(_local, 'pid', None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.connections = {}
+    conn = _local.connections.get(DB_PATH)
+    if conn is None:
+        conn = get_db_connection()
+        _local.connections[DB_PATH] = conn
+    return conn
+
+@contextmanager
+def _connection():
+    conn = _pooled_connection()
+    try:
+        yield conn
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+def close_thread_connections():
+    # Closes this thread's pooled connections (e.g. at the end of a worker thread)
+    for conn in getattr(_local, 'connections', {}).values():
+        conn.close()
+    _local.connections = {}
+
+# Schema migrations. PRAGMA user_version records the last one applied; each
+# migration runs once, in order, inside its own transaction. Append new ones
+# to MIGRATIONS, never edit one that has shipped.
+
+def _migration_base_schema(conn):
+    # The original schema, including the old in-place upgrades of chat_history
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
@@ -24,9 +80,7 @@ def init_db():
             password TEXT NOT NULL
         )
     ''')
-    
-    # Create Sessions Table
-    c.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS sessions (
             id TEXT PRIMARY KEY,
             user_id INTEGER NOT NULL,
@@ -37,32 +91,14 @@ def init_db():
     ''')
 
     # Rename chat_history to messages if it exists and add session_id
-    # This is a migration step for existing databases
-    try:
-        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='chat_history';")
-        if c.fetchone():
-            print("Migrating 'chat_history' table to 'messages'...")
-            c.execute("ALTER TABLE chat_history RENAME TO messages;")
-            conn.commit()
-            print("Table 'chat_history' renamed to 'messages'.")
-    except Exception as e:
-        print(f"Error during chat_history rename: {e}")
-
-    # Check if session_id exists in messages table, add if not
-    try:
-        c.execute('SELECT session_id FROM messages LIMIT 1')
-    except sqlite3.OperationalError: # This error occurs if the column does not exist
+    if conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='chat_history'").fetchone():
+        print("Migrating 'chat_history' table to 'messages'...")
+        conn.execute('ALTER TABLE chat_history RENAME TO messages')
+    if _table_exists(conn, 'messages') and 'session_id' not in _columns(conn, 'messages'):
         print("Migrating messages table to include session_id...")
-        try:
-            c.execute('ALTER TABLE messages ADD COLUMN session_id TEXT')
-            conn.commit()
-            print("Column 'session_id' added to 'messages' table.")
-        except Exception as e:
-            print(f"Migration error (might be okay if column exists): {e}")
-    
-    # Create Messages Table (or ensure it's correctly structured after migration)
-    # This ensures the table has the correct schema, including foreign key for session_id
-    c.execute('''
+        conn.execute('ALTER TABLE messages ADD COLUMN session_id TEXT')
+
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS messages (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER NOT NULL,
@@ -74,9 +110,143 @@ def init_db():
             FOREIGN KEY (session_id) REFERENCES sessions (id)
         )
     ''')
-    
-    conn.commit()
-    conn.close()
+
+def _migration_rebuild_messages(conn):
+    # Tables upgraded from chat_history got session_id through ALTER TABLE, which
+    # can't add a foreign key. SQLite can't alter constraints either, so copy the
+    # rows into a correctly declared table. Messages pointing at sessions that no
+    # longer exist are kept but detached (session_id NULL). The keys are enforced
+    # (get_db_connection turns foreign_keys on), so deleting a session or user
+    # deletes its messages.
+    conn.execute('''
+        CREATE TABLE messages_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            session_id TEXT,
+            sender TEXT NOT NULL,
+            message TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO messages_new (id, user_id, session_id, sender, message, timestamp)
+        SELECT m.id, m.user_id, s.id, m.sender, m.message, m.timestamp
+        FROM messages m LEFT JOIN sessions s ON s.id = m.session_id
+    ''')
+    conn.execute('DROP TABLE messages')
+    conn.execute('ALTER TABLE messages_new RENAME TO messages')
+
+def _migration_query_indexes(conn):
+    # One index per access path, in the column order of WHERE + ORDER BY so
+    # SQLite walks the index instead of scanning and sorting
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_messages_user_time ON messages (user_id, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_messages_session_time ON messages (session_id, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user_created ON sessions (user_id, created_at)')
+    conn.execute('ANALYZE')
+
+def _migration_diagnoses(conn):
+    # Diagnoses used to be recovered by LIKE-scanning every bot message of a user.
+    # They get their own table now, filled from the existing chat text once.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS diagnoses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            session_id TEXT,
+            message_id INTEGER,
+            disease TEXT NOT NULL,
+            confidence REAL,
+            severity TEXT,
+            model TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE,
+            FOREIGN KEY (message_id) REFERENCES messages (id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_diagnoses_user_time ON diagnoses (user_id, timestamp)')
+
+    rows = conn.execute('''
+        SELECT id, user_id, session_id, message, timestamp FROM messages
+        WHERE sender = 'bot' AND (message LIKE '%### Diagnosis:%' OR message LIKE '%fa-user-doctor%')
+        ORDER BY id
+    ''')
+    backfilled = 0
+    for row in rows.fetchall():
+        disease = parse_diagnosis(row['message'])
+        if disease:
+            conn.execute('''
+                INSERT INTO diagnoses (user_id, session_id, message_id, disease, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (row['user_id'], row['session_id'], row['id'], disease, row['timestamp']))
+            backfilled += 1
+    if backfilled:
+        print(f"Backfilled {backfilled} diagnoses from chat history.")
+
+def _migration_session_keyset_index(conn):
+    # Session pages are ordered by (created_at, id); id is a TEXT key, not the rowid,
+    # so it has to be in the index for keyset pagination to avoid a sort
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user_created_id ON sessions (user_id, created_at, id)')
+    conn.execute('DROP INDEX IF EXISTS idx_sessions_user_created')
+
+MIGRATIONS = [
+    (1, 'base schema', _migration_base_schema),
+    (2, 'rebuild messages with foreign keys', _migration_rebuild_messages),
+    (3, 'indexes for message and session lookups', _migration_query_indexes),
+    (4, 'diagnoses table', _migration_diagnoses),
+    (5, 'keyset index for sessions', _migration_session_keyset_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def _table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(conn, target=None):
+    """Applies pending migrations up to `target` (default: latest). Returns the new version."""
+    target = SCHEMA_VERSION if target is None else target
+    version = get_schema_version(conn)
+    # Table rebuilds drop and rename tables, which must not cascade; the pragma
+    # only changes outside a transaction, so it is switched off around all of them
+    conn.execute('PRAGMA foreign_keys=OFF')
+    try:
+        return _apply_migrations(conn, version, target)
+    finally:
+        conn.execute('PRAGMA foreign_keys=ON')
+
+def _apply_migrations(conn, version, target):
+    for number, name, apply in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        print(f"Applying migration {number}: {name}...")
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Re-check under the write lock, another worker may have got here first
+            if get_schema_version(conn) >= number:
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = number
+    return version
+
+def init_db():
+    conn = get_db_connection()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
     print("Database initialized.")
 
 def create_user(name, email, password):
@@ -84,96 +254,178 @@ def create_user(name, email, password):
     if get_user_by_email(email):
         return False
     
-    conn = get_db_connection()
     hashed = generate_password_hash(password)
     try:
-        c = conn.cursor()
-        c.execute('INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
-                  (name, email, hashed))
-        conn.commit()
+        with _connection() as conn, conn:
+            cur = conn.execute('INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
+                               (name, email, hashed))
+        invalidate_user(cur.lastrowid, email)
         return True
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
 
-def get_user_by_email(email):
-    conn = get_db_connection()
-    user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
-    conn.close()
+def _user_id_key(user_id):
+    # Flask-Login hands us the id as a string
+    try:
+        return ('id', int(user_id))
+    except (TypeError, ValueError):
+        return ('id', user_id)
+
+def _cache_user(user):
+    # Only real rows are cached, so a user created by another worker is found right away
+    if user is not None:
+        _user_cache.set(_user_id_key(user['id']), user)
+        _user_cache.set(('email', user['email']), user)
     return user
 
+def invalidate_user(user_id=None, email=None):
+    # Call after any write to a user row
+    for key in (_user_id_key(user_id) if user_id is not None else None,
+                ('email', email) if email is not None else None):
+        if key is None:
+            continue
+        user = _user_cache.pop(key)
+        if user is not None:
+            _user_cache.pop(_user_id_key(user['id']))
+            _user_cache.pop(('email', user['email']))
+
+def clear_user_cache():
+    _user_cache.clear()
+
+def user_cache_stats():
+    return _user_cache.stats()
+
+def get_user_by_email(email):
+    user = _user_cache.get(('email', email))
+    if user is not None:
+        return user
+    with _connection() as conn:
+        return _cache_user(conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone())
+
 def get_messages_by_user(user_id):
-    conn = get_db_connection()
-    messages = conn.execute('SELECT * FROM messages WHERE user_id = ? ORDER BY timestamp ASC', (user_id,)).fetchall()
-    conn.close()
-    return messages
+    with _connection() as conn:
+        return conn.execute('SELECT * FROM messages WHERE user_id = ? ORDER BY timestamp ASC', (user_id,)).fetchall()
+
+# Diagnosis messages as saved by the frontend: the current HTML card, or the
+# older markdown format ("### Diagnosis: <disease>")
+_DIAGNOSIS_PATTERNS = [
+    re.compile(r'fa-user-doctor"></i>\s*(.+?)\s*</h3>', re.S),
+    re.compile(r'### Diagnosis:\s*(.+?)(?:\n|$)'),
+]
+
+def parse_diagnosis(message):
+    # Disease name from a saved bot message, or None if it isn't a diagnosis
+    for pattern in _DIAGNOSIS_PATTERNS:
+        match = pattern.search(message or '')
+        if match:
+            disease = html.unescape(match.group(1)).replace('*', '').strip()
+            if disease:
+                return disease
+    return None
 
 def get_user_diagnoses(user_id):
-    conn = get_db_connection()
-    # Filter for bot messages that likely contain a diagnosis result
-    # We look for the specific marker we use in main.js/api: "Diagnosis:" or "Predicted Disease"
-    # Actually, the bot message stored usually contains the full markdown response.
-    # The prompt in api.py says: "You are a medical assistant..." and returns JSON.
-    # Wait, the CHAT HISTORY stores the "message" field.
-    # In api.py, when a prediction happens:
-    # 1. User sends symptoms.
-    # 2. Server returns JSON { "disease": ..., "description": ... }
-    # 3. Frontend displays it.
-    # 4. Frontend calls /api/chat/message to SAVE the bot response.
-    # In main.js: frontend.saveMessage(msgContent, 'bot');
-    # The msgContent for a diagnosis is: `### Diagnosis: ${result.disease}\n\n${result.description[state.lang]}...`
-    # So we can look for "### Diagnosis:"
-    
+    # Newest first; 'id' is the chat message the diagnosis was shown in
     query = """
-        SELECT id, message, timestamp 
-        FROM messages 
-        WHERE user_id = ? AND sender = 'bot' AND message LIKE '%### Diagnosis:%'
-        ORDER BY timestamp DESC
+        SELECT message_id, disease, confidence, severity, model, timestamp
+        FROM diagnoses
+        WHERE user_id = ?
+        ORDER BY timestamp DESC, id DESC
     """
-    rows = conn.execute(query, (user_id,)).fetchall()
-    conn.close()
-    
-    diagnoses = []
-    import re
-    for row in rows:
-        # Extract disease name using regex
-        match = re.search(r"### Diagnosis:\s*(.+?)(\n|$)", row['message'])
-        if match:
-            disease = match.group(1).strip()
-            # Clean up markdown if any * are there
-            disease = disease.replace('*', '')
-            diagnoses.append({
-                'id': row['id'],
-                'disease': disease,
-                'date': row['timestamp'].split(' ')[0] # Just the date part
-            })
-    return diagnoses
+    with _connection() as conn:
+        rows = conn.execute(query, (user_id,)).fetchall()
+    return [{
+        'id': row['message_id'],
+        'disease': row['disease'],
+        'date': str(row['timestamp']).split(' ')[0], # Just the date part
+        'confidence': row['confidence'],
+        'severity': row['severity'],
+        'model': row['model']
+    } for row in rows]
 
 def get_user_by_id(user_id):
-    conn = get_db_connection()
-    c = conn.cursor()
-    user = c.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-    conn.close()
-    return user
+    user = _user_cache.get(_user_id_key(user_id))
+    if user is not None:
+        return user
+    with _connection() as conn:
+        return _cache_user(conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone())
 
 def verify_password(stored_password, provided_password):
     return check_password_hash(stored_password, provided_password)
     
-def save_chat_message(user_id, sender, message, session_id=None):
-    conn = get_db_connection()
-    conn.execute('INSERT INTO messages (user_id, session_id, sender, message) VALUES (?, ?, ?, ?)', 
-                 (user_id, session_id, sender, message))
-    conn.commit()
-    conn.close()
+# session_id comes from the client; one that matches no session (deleted, or never
+# created) is stored as NULL, a detached message, rather than failing the foreign key
+_SESSION_OR_NULL = '(SELECT id FROM sessions WHERE id = ?)'
+
+def _insert_message(conn, user_id, sender, message, session_id=None):
+    cur = conn.execute(f'INSERT INTO messages (user_id, session_id, sender, message) VALUES (?, {_SESSION_OR_NULL}, ?, ?)',
+                       (user_id, session_id, sender, message))
+    return cur.lastrowid
+
+def _insert_diagnosis(conn, user_id, message_id, prediction, session_id=None):
+    conn.execute(f'''
+        INSERT INTO diagnoses (user_id, session_id, message_id, disease, confidence, severity, model)
+        VALUES (?, {_SESSION_OR_NULL}, ?, ?, ?, ?, ?)
+    ''', (user_id, session_id, message_id, prediction['disease'],
+          prediction.get('confidence'), prediction.get('severity'), prediction.get('model')))
+
+def _store_message(conn, user_id, sender, message, session_id=None, prediction=None):
+    message_id = _insert_message(conn, user_id, sender, message, session_id)
+    if prediction:
+        _insert_diagnosis(conn, user_id, message_id, prediction, session_id)
+    return message_id
+
+def _store_message_batch(items):
+    # Writer thread of the write-behind queue: one transaction for the whole batch
+    with _connection() as conn, conn:
+        return [_store_message(conn, *item) for item in items]
+
+_message_queue = None
+
+def enable_write_behind(max_size=10000, batch_size=200, flush_interval=0.02, ack='flush'):
+    """
+    Routes save_chat_message through a write-behind queue with group commit.
+    ack='flush' waits for the batch commit, ack='none' returns once queued.
+    The queue drains at interpreter exit (or call disable_write_behind()).
+    """
+    global _message_queue
+    from utils.write_behind import WriteBehindQueue
+    disable_write_behind()
+    _message_queue = WriteBehindQueue(_store_message_batch, max_size=max_size, batch_size=batch_size,
+                                      flush_interval=flush_interval, ack=ack, name='chat-messages')
+    return _message_queue
+
+def disable_write_behind():
+    # Drains queued messages, then goes back to one commit per message
+    global _message_queue
+    if _message_queue is not None:
+        _message_queue.close()
+        _message_queue = None
+
+def message_queue_stats():
+    return _message_queue.stats() if _message_queue is not None else None
+
+def save_chat_message(user_id, sender, message, session_id=None, prediction=None):
+    # prediction: optional {'disease', 'confidence', 'severity', 'model'} for a diagnosis
+    # message. Without it, bot messages are still recognised by their text.
+    # Returns the message id (None when queued with ack='none').
+    if sender == 'bot' and not prediction:
+        disease = parse_diagnosis(message)
+        prediction = {'disease': disease} if disease else None
+    item = (user_id, sender, message, session_id, prediction)
+    write_queue = _message_queue
+    if write_queue is not None:
+        try:
+            return write_queue.submit(item)
+        except (queue.Full, RuntimeError):
+            pass # Queue saturated or shutting down: write it directly instead
+    with _connection() as conn, conn:
+        return _store_message(conn, *item)
 
 def get_chat_history(user_id):
-    conn = get_db_connection()
-    c = conn.cursor()
     # Fallback to messages table, filtering by session if needed, but this might just return all?
     # For now, let's just select from messages.
-    history = c.execute('SELECT sender, message, timestamp FROM messages WHERE user_id = ? ORDER BY timestamp ASC', (user_id,)).fetchall()
-    conn.close()
+    with _connection() as conn:
+        history = conn.execute('SELECT sender, message, timestamp FROM messages WHERE user_id = ? ORDER BY timestamp ASC', (user_id,)).fetchall()
     return [dict(row) for row in history]
 
 # Session Helpers
@@ -183,28 +435,101 @@ def create_session(user_id, title=None):
         title = f"Session {datetime.now().strftime('%Y-%m-%d %H:%M')}"
     
     session_id = str(uuid.uuid4())
-    conn = get_db_connection()
-    conn.execute('INSERT INTO sessions (id, user_id, title) VALUES (?, ?, ?)',
-                 (session_id, user_id, title))
-    conn.commit()
-    conn.close()
+    with _connection() as conn, conn:
+        conn.execute('INSERT INTO sessions (id, user_id, title) VALUES (?, ?, ?)',
+                     (session_id, user_id, title))
     return session_id
 
 def get_user_sessions(user_id):
-    conn = get_db_connection()
-    sessions = conn.execute('SELECT * FROM sessions WHERE user_id = ? ORDER BY created_at DESC', (user_id,)).fetchall()
-    conn.close()
-    return sessions
+    with _connection() as conn:
+        return conn.execute('SELECT * FROM sessions WHERE user_id = ? ORDER BY created_at DESC', (user_id,)).fetchall()
 
 def delete_session(session_id):
-    conn = get_db_connection()
-    conn.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
-    conn.execute('DELETE FROM messages WHERE session_id = ?', (session_id,)) # Cascade delete messages
-    conn.commit()
-    conn.close()
+    with _connection() as conn, conn:
+        # Its messages and diagnoses go with it (ON DELETE CASCADE)
+        conn.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
 
 def get_session_messages(session_id):
+    with _connection() as conn:
+        return conn.execute('SELECT * FROM messages WHERE session_id = ? ORDER BY timestamp ASC', (session_id,)).fetchall()
+
+# Keyset pagination
+# Pages are ordered by (timestamp, id) and the cursor is the key of the last row
+# sent, so each page is an index range scan no matter how deep the client is.
+
+def encode_cursor(timestamp, row_id):
+    raw = json.dumps([timestamp, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    # Raises ValueError for anything that isn't a cursor we issued
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(timestamp, str) or not isinstance(row_id, (int, str)):
+        raise ValueError('Invalid cursor')
+    return timestamp, row_id
+
+def _keyset_page(query, params, cursor, limit, key, descending=False):
+    # query must contain a {where} slot for the cursor condition and order by
+    # (key[0], key[1]) in the given direction. One extra row tells us if there's more.
+    if cursor:
+        op = '<' if descending else '>'
+        where = f'AND ({key[0]}, {key[1]}) {op} (?, ?)'
+        params = tuple(params) + decode_cursor(cursor)
+    else:
+        where = ''
+    with _connection() as conn:
+        rows = conn.execute(query.format(where=where) + ' LIMIT ?', tuple(params) + (limit + 1,)).fetchmany(limit + 1)
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last[key[0]], last[key[1]])
+    return items, next_cursor
+
+def get_chat_history_page(user_id, limit, cursor=None):
+    return _keyset_page(
+        'SELECT id, sender, message, timestamp FROM messages WHERE user_id = ? {where} ORDER BY timestamp ASC, id ASC',
+        (user_id,), cursor, limit, ('timestamp', 'id'))
+
+def get_session_messages_page(session_id, limit, cursor=None):
+    return _keyset_page(
+        'SELECT * FROM messages WHERE session_id = ? {where} ORDER BY timestamp ASC, id ASC',
+        (session_id,), cursor, limit, ('timestamp', 'id'))
+
+def get_user_sessions_page(user_id, limit, cursor=None):
+    return _keyset_page(
+        'SELECT * FROM sessions WHERE user_id = ? {where} ORDER BY created_at DESC, id DESC',
+        (user_id,), cursor, limit, ('created_at', 'id'), descending=True)
+
+# Streaming reads for exports
+# Each iterator holds its own connection and pulls rows with fetchmany, so memory
+# stays flat however long the history is.
+
+def _iter_rows(query, params, batch_size=500):
     conn = get_db_connection()
-    messages = conn.execute('SELECT * FROM messages WHERE session_id = ? ORDER BY timestamp ASC', (session_id,)).fetchall()
-    conn.close()
-    return messages
+    try:
+        cur = conn.execute(query, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+    finally:
+        conn.close()
+
+def iter_user_sessions(user_id, batch_size=500):
+    return _iter_rows('SELECT * FROM sessions WHERE user_id = ? ORDER BY created_at ASC, id ASC',
+                      (user_id,), batch_size)
+
+def iter_user_messages(user_id, batch_size=500):
+    return _iter_rows('SELECT * FROM messages WHERE user_id = ? ORDER BY timestamp ASC, id ASC',
+                      (user_id,), batch_size)
+
+def iter_user_diagnoses(user_id, batch_size=500):
+    return _iter_rows('SELECT * FROM diagnoses WHERE user_id = ? ORDER BY timestamp ASC, id ASC',
+                      (user_id,), batch_size)
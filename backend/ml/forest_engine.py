@@ -0,0 +1,164 @@
+"""
+Compiled format for RandomForestClassifier / ExtraTreesClassifier /
+DecisionTreeClassifier.
+
+export_forest() flattens every tree of a fitted forest into one node table
+in compact dtypes, one .npy file per array so a worker can memory-map it:
+
+    feature     int16/int32  split feature (0 for a leaf)
+    threshold   float32      go left when x[feature] <= threshold
+    children    int32        (n_nodes, 2) global left/right child ids; a leaf points to itself
+    leaf        int32        leaf id of each node, -1 for an inner node
+    roots       int32        root node of each tree
+    leaf_ptr    int32        CSR row pointers into the leaf class distributions
+    leaf_class  uint8/16/32  class index of each nonzero leaf entry
+    leaf_value  float64      the tree's predict_proba value for that class
+
+scikit-learn stores a dense n_classes vector for every node, inner ones
+included; leaves of a deep tree only hold a few classes, so the CSR leaf
+table is most of the saving. ForestEngine walks all trees for a batch of
+rows at once, one tree level per step, then sums the leaf distributions in
+tree order, which gives the same float64 probabilities as scikit-learn.
+"""
+import os
+
+import numpy as np
+
+ARRAYS = ('feature', 'threshold', 'children', 'leaf', 'roots', 'leaf_ptr', 'leaf_class', 'leaf_value', 'classes', 'shape')
+
+
+def _smallest_int(max_value, signed=False):
+    for dtype in ((np.int16, np.int32) if signed else (np.uint8, np.uint16, np.uint32)):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _float32_below(threshold):
+    # Largest float32 <= threshold: for float32 inputs (scikit-learn converts X
+    # to float32 too) x <= this exactly when x <= the float64 threshold
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def export_forest(model):
+    """Node and leaf arrays for a fitted single-output forest or tree, None for anything else."""
+    name = model.__class__.__name__
+    if name in ('RandomForestClassifier', 'ExtraTreesClassifier'):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+    elif name == 'DecisionTreeClassifier':
+        trees = [model.tree_]
+    else:
+        return None
+    if getattr(model, 'n_outputs_', 1) != 1:
+        return None
+
+    n_classes = len(model.classes_)
+    features, thresholds, children, leaves, roots = [], [], [], [], []
+    leaf_counts, leaf_classes, leaf_values = [], [], []
+    node_base = leaf_base = max_depth = 0
+    for tree in trees:
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(tree.node_count) + node_base
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        children.append(np.column_stack((np.where(is_leaf, node_ids, tree.children_left + node_base),
+                                         np.where(is_leaf, node_ids, tree.children_right + node_base))))
+        leaves.append(np.where(is_leaf, np.cumsum(is_leaf) - 1 + leaf_base, -1))
+        roots.append(node_base)
+
+        # scikit-learn >= 1.4 stores class fractions and returns them as they are;
+        # older versions store counts and normalize them in predict_proba
+        proba = tree.value[is_leaf, 0, :n_classes]
+        normalizer = proba.sum(axis=1, keepdims=True)
+        if (normalizer > 1 + 1e-9).any():
+            normalizer[normalizer == 0.0] = 1.0
+            proba = proba / normalizer
+        leaf_rows, leaf_cols = np.nonzero(proba)
+        leaf_counts.append(np.bincount(leaf_rows, minlength=len(proba)))
+        leaf_classes.append(leaf_cols)
+        leaf_values.append(proba[leaf_rows, leaf_cols])
+
+        node_base += tree.node_count
+        leaf_base += int(is_leaf.sum())
+        max_depth = max(max_depth, tree.max_depth)
+
+    return {
+        'kind': np.array('forest'),
+        'feature': np.concatenate(features).astype(_smallest_int(model.n_features_in_, signed=True)),
+        'threshold': _float32_below(np.concatenate(thresholds)),
+        'children': np.concatenate(children).astype(np.int32),
+        'leaf': np.concatenate(leaves).astype(np.int32),
+        'roots': np.array(roots, dtype=np.int32),
+        'leaf_ptr': np.concatenate(([0], np.cumsum(np.concatenate(leaf_counts)))).astype(np.int32),
+        'leaf_class': np.concatenate(leaf_classes).astype(_smallest_int(n_classes)),
+        'leaf_value': np.concatenate(leaf_values).astype(np.float64),
+        'classes': np.asarray(model.classes_),
+        'shape': np.array([model.n_features_in_, max_depth], dtype=np.int64) # n_features, deepest tree
+    }
+
+
+def save_forest(directory, arrays):
+    # One .npy per array: unlike .npz these can be opened with mmap_mode
+    os.makedirs(directory, exist_ok=True)
+    for name, value in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), value)
+
+
+class ForestEngine:
+    """Scores rows of active feature indices (tuples, as from ArtifactSet.vectorize)."""
+
+    kind = 'forest'
+
+    def __init__(self, arrays):
+        import scipy.sparse as sp
+        # np.asarray drops the memmap subclass (slow to index) but keeps the mapping
+        for name in ARRAYS:
+            setattr(self, name, np.asarray(arrays[name]))
+        self.classes_ = self.classes
+        self.n_features, self.max_depth = (int(v) for v in self.shape)
+        self._flat_children = self.children.reshape(-1)
+        # Leaf x class matrix sharing the leaf arrays
+        self._leaf_matrix = sp.csr_matrix((self.leaf_value, self.leaf_class, self.leaf_ptr),
+                                          shape=(len(self.leaf_ptr) - 1, len(self.classes_)))
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        # Read-only maps: the node tables live in the page cache, shared by every worker
+        arrays = {}
+        for name in ARRAYS:
+            path = os.path.join(directory, f"{name}.npy")
+            arrays[name] = np.load(path, mmap_mode=None if name == 'classes' else mmap_mode)
+        return cls(arrays)
+
+    def apply(self, X):
+        """Leaf id reached in every tree, (n_rows, n_trees), for a float32 feature matrix X."""
+        n_rows, n_features = X.shape
+        node = np.tile(self.roots, (n_rows, 1))
+        row_base = (np.arange(n_rows) * n_features)[:, None]
+        flat = X.reshape(-1)
+        # Leaves point to themselves, so every row can take max_depth steps
+        for _ in range(self.max_depth):
+            go_right = flat.take(row_base + self.feature.take(node)) > self.threshold.take(node)
+            node = self._flat_children.take(node * 2 + go_right)
+        return self.leaf.take(node)
+
+    def predict_proba(self, rows):
+        X = np.zeros((len(rows), self.n_features), dtype=np.float32)
+        for i, columns in enumerate(rows):
+            X[i, list(columns)] = 1
+        return self.predict_proba_matrix(X)
+
+    def predict_proba_matrix(self, X):
+        """predict_proba for a dense feature matrix, like the estimator's."""
+        import scipy.sparse as sp
+        leaves = self.apply(np.ascontiguousarray(X, dtype=np.float32))
+        n_rows, n_trees = leaves.shape
+
+        # rows x leaves indicator times the leaf distributions; leaf ids grow with
+        # the tree index, so each row's sum runs tree by tree like scikit-learn's
+        hits = sp.csr_matrix((np.ones(leaves.size), leaves.reshape(-1), np.arange(0, leaves.size + 1, n_trees)),
+                             shape=(n_rows, self._leaf_matrix.shape[0]))
+        return (hits @ self._leaf_matrix).toarray() / n_trees
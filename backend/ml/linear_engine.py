@@ -0,0 +1,134 @@
+"""
+NumPy-only scoring for the linear models: LogisticRegression, MultinomialNB
+and SVC(kernel='linear', probability=True).
+
+export_model() turns a fitted estimator into plain arrays (weights, bias,
+calibration) at training time; LinearEngine computes the same probabilities
+as the estimator's predict_proba without importing scikit-learn. Features are
+binary, so a row is just its active symptom columns and the product with the
+weight matrix is a sum of those columns' weight rows.
+"""
+import numpy as np
+
+MIN_PROB = 1e-7 # libsvm clips pairwise probabilities to [MIN_PROB, 1 - MIN_PROB]
+
+
+def export_model(model):
+    """
+    {'kind', 'classes', 'weights' (features x outputs), 'bias', ...} for a
+    supported fitted estimator, None for anything else.
+    """
+    name = model.__class__.__name__
+    classes = np.asarray(model.classes_)
+
+    if name == 'LogisticRegression':
+        coef, intercept = np.asarray(model.coef_), np.asarray(model.intercept_)
+        if coef.shape[0] == 1:
+            kind = 'logistic_binary'
+        elif getattr(model, 'multi_class', 'auto') == 'ovr':
+            kind = 'logistic_ovr'
+        else:
+            kind = 'softmax'
+        return {'kind': kind, 'classes': classes, 'weights': coef.T.copy(), 'bias': intercept.copy()}
+
+    if name == 'MultinomialNB':
+        # Joint log likelihood X @ feature_log_prob_.T + class_log_prior_, normalized like a softmax
+        return {'kind': 'softmax', 'classes': classes,
+                'weights': np.asarray(model.feature_log_prob_).T.copy(),
+                'bias': np.asarray(model.class_log_prior_).copy()}
+
+    if name == 'SVC' and model.kernel == 'linear' and len(getattr(model, 'probA_', [])):
+        # coef_ holds one weight vector per class pair (0,1), (0,2), ..., (1,2), ...,
+        # in libsvm's order; scikit-learn negates the binary case, undone here
+        sign = -1.0 if len(classes) == 2 else 1.0
+        coef = model.coef_.toarray() if hasattr(model.coef_, 'toarray') else np.asarray(model.coef_)
+        return {'kind': 'ovo_svc', 'classes': classes,
+                'weights': sign * coef.T, 'bias': sign * np.asarray(model.intercept_),
+                'prob_a': np.asarray(model.probA_).copy(), 'prob_b': np.asarray(model.probB_).copy()}
+    return None
+
+
+def save_engine(path, arrays):
+    # Uncompressed .npz, read back by LinearEngine.load
+    np.savez(path, **arrays)
+
+
+class LinearEngine:
+    """Scores rows of active feature indices (tuples, as from ArtifactSet.vectorize)."""
+
+    def __init__(self, arrays):
+        self.kind = str(arrays['kind'])
+        self.classes_ = arrays['classes']
+        self.weights = np.ascontiguousarray(arrays['weights'], dtype=np.float64)
+        self.bias = np.asarray(arrays['bias'], dtype=np.float64)
+        self.prob_a = arrays.get('prob_a')
+        self.prob_b = arrays.get('prob_b')
+        if self.kind == 'ovo_svc':
+            k = len(self.classes_)
+            self._pairs = np.triu_indices(k, 1) # (i, j) for i < j, the same order as the weight columns
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def decision_function(self, rows):
+        # bias + the weight rows of each row's active columns
+        scores = np.tile(self.bias, (len(rows), 1))
+        if len(rows) == 1:
+            # The common single-patient case, without the batch bookkeeping below
+            if len(rows[0]):
+                scores[0] += self.weights[list(rows[0])].sum(axis=0)
+            return scores
+        lengths = np.fromiter((len(r) for r in rows), dtype=np.intp, count=len(rows))
+        if lengths.sum() == 0:
+            return scores
+        columns = np.fromiter((c for r in rows for c in r), dtype=np.intp, count=int(lengths.sum()))
+        present = lengths > 0
+        starts = (np.cumsum(lengths) - lengths)[present]
+        scores[present] += np.add.reduceat(self.weights[columns], starts, axis=0)
+        return scores
+
+    def predict_proba(self, rows):
+        scores = self.decision_function(rows)
+        if self.kind == 'softmax':
+            scores -= scores.max(axis=1, keepdims=True)
+            np.exp(scores, out=scores)
+            return scores / scores.sum(axis=1, keepdims=True)
+        if self.kind == 'logistic_binary':
+            p = _sigmoid(scores[:, 0])
+            return np.column_stack((1 - p, p))
+        if self.kind == 'logistic_ovr':
+            p = _sigmoid(scores)
+            return p / p.sum(axis=1, keepdims=True)
+        return self._couple(scores)
+
+    def _couple(self, decision):
+        # Platt-scaled pairwise probabilities (libsvm's sigmoid_predict), clipped like libsvm
+        pairwise = np.clip(_sigmoid(-(decision * self.prob_a + self.prob_b)), MIN_PROB, 1 - MIN_PROB)
+        n, k = len(decision), len(self.classes_)
+        if k == 2:
+            return np.column_stack((pairwise[:, 0], 1 - pairwise[:, 0]))
+
+        # Wu, Lin & Weng (2004) method 2, the coupling libsvm uses: minimize p'Qp with
+        # sum(p) = 1. libsvm iterates to a tolerance; the KKT system is solved directly
+        # here, so results agree with scikit-learn to within that tolerance.
+        i, j = self._pairs
+        r = np.zeros((n, k, k))
+        r[:, i, j] = pairwise
+        r[:, j, i] = 1 - pairwise
+        system = np.zeros((n, k + 1, k + 1))
+        q = system[:, :k, :k]
+        q[:] = -r * r.transpose(0, 2, 1)
+        q[:, np.arange(k), np.arange(k)] = (r ** 2).sum(axis=1)
+        system[:, :k, k] = 1
+        system[:, k, :k] = 1
+        rhs = np.zeros((n, k + 1, 1))
+        rhs[:, k] = 1
+        p = np.linalg.solve(system, rhs)[:, :k, 0]
+        return p / p.sum(axis=1, keepdims=True)
+
+
+def _sigmoid(x):
+    # tanh form: no overflow warnings for large |x|
+    return 0.5 * (1 + np.tanh(0.5 * x))
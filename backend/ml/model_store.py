@@ -0,0 +1,229 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+from collections.abc import Mapping
+
+from utils.files import write_json_atomic
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(__file__), 'artifacts')
+MANIFEST_NAME = 'manifest.json'
+CURRENT_NAME = 'CURRENT'  # holds the name of the active version directory
+FORMAT_VERSION = 1
+KEEP_VERSIONS = 3
+
+
+# Estimators that take CSR input directly in fit() and predict_proba()
+SPARSE_MODEL_CLASSES = {
+    'MultinomialNB', 'BernoulliNB', 'ComplementNB', 'LogisticRegression', 'SGDClassifier',
+    'DecisionTreeClassifier', 'RandomForestClassifier', 'ExtraTreesClassifier', 'SVC', 'LinearSVC'
+}
+
+
+# Of those, the ones that also predict faster from a CSR row than from a dense
+# one. Naive Bayes multiplies by a transposed (copied) weight matrix and trees
+# pay per-call CSR overhead, so they get dense rows (see bench_sparse.py).
+SPARSE_PREDICT_CLASSES = {'LogisticRegression', 'SGDClassifier', 'SVC', 'LinearSVC'}
+
+
+def _class_name(model):
+    return model if isinstance(model, str) else model.__class__.__name__
+
+
+def accepts_sparse(model):
+    return _class_name(model) in SPARSE_MODEL_CLASSES
+
+
+def predicts_sparse(model):
+    return _class_name(model) in SPARSE_PREDICT_CLASSES
+
+
+def model_slug(name):
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+
+def save_split_artifacts(root, models, primary_name, all_symptoms, results=None, extra=None, publish=True, engines=None):
+    """
+    Writes a new artifact version under root/<version>/:
+        manifest.json        small, loaded eagerly (symptoms, model list, metadata)
+        models/<slug>.joblib one uncompressed file per model so NumPy arrays can be memory-mapped
+        engines/<slug>.npz   optional NumPy-only scorer arrays ({name: arrays}, see linear_engine.py)
+        engines/<slug>/      the same for a compiled forest, one .npy per array (see forest_engine.py)
+    The version is staged in a temporary directory, renamed into place and then
+    published by atomically replacing root/CURRENT, so readers never see a
+    half-written set. Returns the manifest dict.
+    """
+    import joblib
+    import shutil
+    os.makedirs(root, exist_ok=True)
+    created_at = datetime.datetime.now()
+    staging = os.path.join(root, f".staging-{os.getpid()}-{created_at.strftime('%Y%m%d%H%M%S%f')}")
+    model_dir = os.path.join(staging, 'models')
+    os.makedirs(model_dir)
+
+    try:
+        digest = hashlib.sha256()
+        entries = []
+        for name, model in models.items():
+            filename = f"{model_slug(name)}.joblib"
+            path = os.path.join(model_dir, filename)
+            # No compression: compressed pickles can't be memory-mapped
+            joblib.dump(model, path)
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            entry = {
+                'name': name,
+                'file': os.path.join('models', filename),
+                'class': model.__class__.__name__,
+                'size_bytes': os.path.getsize(path)
+            }
+            if engines and name in engines:
+                from ml.linear_engine import save_engine
+                from ml.forest_engine import save_forest
+                arrays = engines[name]
+                os.makedirs(os.path.join(staging, 'engines'), exist_ok=True)
+                if str(arrays.get('kind')) == 'forest':
+                    # A directory of .npy files, memory-mapped at load
+                    engine_file = os.path.join('engines', model_slug(name))
+                    save_forest(os.path.join(staging, engine_file), arrays)
+                    paths = [os.path.join(staging, engine_file, f) for f in sorted(os.listdir(os.path.join(staging, engine_file)))]
+                else:
+                    engine_file = os.path.join('engines', f"{model_slug(name)}.npz")
+                    paths = [os.path.join(staging, engine_file)]
+                    save_engine(paths[0], arrays)
+                for engine_path in paths:
+                    with open(engine_path, 'rb') as f:
+                        digest.update(f.read())
+                entry['engine'] = engine_file
+                entry['engine_size_bytes'] = sum(os.path.getsize(p) for p in paths)
+            entries.append(entry)
+
+        version = f"{created_at.strftime('%Y%m%d%H%M%S')}-{digest.hexdigest()[:8]}"
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'version': version,
+            'created_at': created_at.isoformat(),
+            'primary_model': primary_name,
+            'all_symptoms': list(all_symptoms),
+            'models': entries,
+            'results': results or {}
+        }
+        manifest.update(extra or {})
+        write_json_atomic(os.path.join(staging, MANIFEST_NAME), manifest, indent=2, ensure_ascii=False)
+        os.rename(staging, os.path.join(root, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if publish:
+        publish_version(root, version)
+    return manifest
+
+
+def publish_version(root, version):
+    """Points root/CURRENT at an existing version and prunes old ones."""
+    if not os.path.exists(os.path.join(root, version, MANIFEST_NAME)):
+        raise FileNotFoundError(f"Artifact version {version} not found in {root}")
+    tmp = os.path.join(root, f"{CURRENT_NAME}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(root, CURRENT_NAME))
+    prune_versions(root, keep=KEEP_VERSIONS)
+
+
+def list_versions(root):
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root)
+                  if not d.startswith('.') and os.path.exists(os.path.join(root, d, MANIFEST_NAME)))
+
+
+def prune_versions(root, keep=KEEP_VERSIONS):
+    # Older versions stay around briefly so in-flight requests can still lazy-load from them
+    import shutil
+    current = _read_current(root)
+    versions = [v for v in list_versions(root) if v != current]
+    for version in versions[:max(0, len(versions) - (keep - 1))]:
+        shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+
+def _read_current(root):
+    try:
+        with open(os.path.join(root, CURRENT_NAME), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current_artifact_dir(root):
+    """Directory of the active version, or None if no split artifacts exist."""
+    current = _read_current(root)
+    if current and os.path.exists(os.path.join(root, current, MANIFEST_NAME)):
+        return os.path.join(root, current)
+    if os.path.exists(os.path.join(root, MANIFEST_NAME)):
+        return root # Unversioned layout written before CURRENT existed
+    return None
+
+
+def artifact_fingerprint(root):
+    """Cheap token that changes whenever a different version becomes active."""
+    current = _read_current(root)
+    if current:
+        return current
+    path = os.path.join(root, MANIFEST_NAME)
+    if os.path.exists(path):
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+    return None
+
+
+def load_manifest(directory):
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class LazyModels(Mapping):
+    """
+    Read-only {name: model} mapping that loads each model on first access.
+    Models are opened with joblib's mmap_mode so their arrays are backed by the
+    page cache and shared between worker processes instead of copied into each.
+    Copy-on-write ('c') rather than 'r' because libsvm insists on writable
+    buffers; inference never writes, so the pages stay shared.
+    """
+
+    def __init__(self, directory, entries, mmap_mode='c'):
+        self.directory = directory
+        self.entries = {e['name']: e for e in entries}
+        self.mmap_mode = mmap_mode
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        entry = self.entries[name]
+        with self._lock:
+            if name not in self._models:
+                import joblib
+                path = os.path.join(self.directory, entry['file'])
+                self._models[name] = joblib.load(path, mmap_mode=self.mmap_mode)
+            return self._models[name]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def loaded(self):
+        return list(self._models)
+
+    def class_names(self):
+        return {name: e.get('class', 'Unknown') for name, e in self.entries.items()}
@@ -1,33 +1,109 @@
 import os
+import threading
+import time
+import datetime
+from collections import namedtuple
 
-class DiseasePredictor:
-    def __init__(self):
-        self.model_path = os.path.join(os.path.dirname(__file__), 'model.pkl')
-        self.data_dir = os.path.join(os.path.dirname(__file__), 'data')
-        self.model = None
+# Immutable per-disease reference data compiled at load time.
+# description: ((lang, text), ...), precautions: (((lang, text), ...), ...)
+DiseaseRecord = namedtuple('DiseaseRecord', ['description', 'severity', 'precautions'])
+
+LANGS = ('en', 'hi', 'ta')
+DEFAULT_PRECAUTION = {'en': 'Consult a doctor', 'hi': 'डॉक्टर से सलाह लें', 'ta': 'மருத்துவரை அணுகவும்'}
+DEFAULT_RECORD = DiseaseRecord(tuple((lang, '') for lang in LANGS), 'Medium', ())
+
+class ArtifactSet:
+    """
+    One loaded generation of model artifacts plus the reference data derived
+    from them. Never mutated after load(); a reload builds a new ArtifactSet
+    and swaps it in, so a request that grabbed the old one finishes on it.
+    """
+
+    def __init__(self, model_path, artifacts_dir, data_dir, use_engines=True):
+        self.model_path = model_path
+        self.artifacts_dir = artifacts_dir
+        self.data_dir = data_dir
+        self.use_engines = use_engines
+        self.engines = {} # name -> LinearEngine / ForestEngine, scored without scikit-learn
+        self._model = None
+        self.all_models = {}
+        self.model_classes = {}
+        self.primary_model_name = None
         self.all_symptoms = None
         self.disease_info = None
         self.precautions = None
         self.severity = None
         self.symptom_aliases = None
-        self._loaded = False
-        
-    def _ensure_loaded(self):
-        if not self._loaded:
-            self.load_artifacts()
+        self.symptom_to_index = {}
+        self.feature_format = 'dense' # 'csr' when the models were trained on sparse features
+        self.symptom_matcher = None
+        self.alias_index = None
+        self.disease_records = {}
+        self.version = None
+        self.fingerprint = None
+        self.loaded_at = None
 
-    def load_artifacts(self):
-        import joblib
+    @property
+    def model(self):
+        # Primary model; with the split layout this loads it on first access
+        if self._model is None and self.primary_model_name in self.all_models:
+            self._model = self.all_models[self.primary_model_name]
+        return self._model
+
+    def primary_model_class(self):
+        if self.primary_model_name in self.model_classes:
+            return self.model_classes[self.primary_model_name]
+        return self._model.__class__.__name__ if self._model is not None else None
+
+    def load(self):
         import pandas as pd
-        self._loaded = True
-        if not os.path.exists(self.model_path):
-            raise FileNotFoundError(f"Model file not found at {self.model_path}")
-            
-        artifacts = joblib.load(self.model_path)
-        self.model = artifacts['model']
-        # Load all models if available
-        self.all_models = artifacts.get('all_models', {})
-        self.all_symptoms = artifacts['all_symptoms']
+        from ml.model_store import current_artifact_dir, artifact_fingerprint, load_manifest, LazyModels
+
+        directory = current_artifact_dir(self.artifacts_dir)
+        if directory is not None:
+            # Split layout: only the small manifest is read now, models load on first use
+            manifest = load_manifest(directory)
+            self.all_models = LazyModels(directory, manifest['models'])
+            self.model_classes = self.all_models.class_names()
+            self.primary_model_name = manifest.get('primary_model')
+            self.all_symptoms = manifest['all_symptoms']
+            self.feature_format = manifest.get('feature_format', 'dense')
+            self.version = manifest['version']
+            self.fingerprint = artifact_fingerprint(self.artifacts_dir)
+            if self.use_engines:
+                self._load_engines(directory, manifest['models'])
+        elif os.path.exists(self.model_path):
+            # Legacy single pickle bundling every model
+            import joblib
+            artifacts = joblib.load(self.model_path)
+            stat = os.stat(self.model_path)
+            self.version = f"{int(stat.st_mtime)}-{stat.st_size}"
+            self.fingerprint = self.version
+            self._model = artifacts['model']
+            # Load all models if available
+            self.all_models = artifacts.get('all_models', {})
+            self.model_classes = {name: m.__class__.__name__ for name, m in self.all_models.items()}
+            self.primary_model_name = next((name for name, m in self.all_models.items() if m is self._model), None)
+            self.all_symptoms = artifacts['all_symptoms']
+            self.feature_format = artifacts.get('feature_format', 'dense')
+            if self.use_engines:
+                # The pickle has no exported engines; build them from the loaded models
+                from ml.linear_engine import LinearEngine, export_model
+                from ml.forest_engine import ForestEngine, export_forest
+                for name, model in self.all_models.items():
+                    arrays = export_model(model)
+                    if arrays is not None:
+                        self.engines[name] = LinearEngine(arrays)
+                        continue
+                    arrays = export_forest(model)
+                    if arrays is not None:
+                        self.engines[name] = ForestEngine(arrays)
+        else:
+            raise FileNotFoundError(f"No model artifacts found in {self.artifacts_dir} or {self.model_path}")
+        self._build_feature_index()
+
+        from ml.symptom_index import SymptomMatcher
+        self.symptom_matcher = SymptomMatcher(self.all_symptoms)
         
         # Load other CSVs
         try:
@@ -36,120 +112,468 @@ class DiseasePredictor:
             self.severity = pd.read_csv(os.path.join(self.data_dir, 'disease_severity.csv')).set_index('disease')
         except Exception as e:
             print(f"Error loading CSVs: {e}")
+        self._compile_disease_records()
 
         try:
             self.symptom_aliases = pd.read_csv(os.path.join(self.data_dir, 'symptom_aliases.csv'))
         except FileNotFoundError:
             self.symptom_aliases = None
+        self._build_alias_index()
+        self.loaded_at = datetime.datetime.now()
+        return self
 
-    def check_symptom(self, user_input, lang='en'):
-        from fuzzywuzzy import process
-        from deep_translator import GoogleTranslator
-        self._ensure_loaded()
-        if not user_input or self.all_symptoms is None:
-            return None, 0
-        text_to_check = user_input
-        if lang != 'en':
+    def _load_engines(self, directory, entries):
+        from ml.linear_engine import LinearEngine
+        from ml.forest_engine import ForestEngine
+        for entry in entries:
+            if not entry.get('engine'):
+                continue
             try:
-                translator = GoogleTranslator(source='auto', target='en')
-                translated = translator.translate(user_input)
-                text_to_check = translated
+                path = os.path.join(directory, entry['engine'])
+                engine_class = ForestEngine if os.path.isdir(path) else LinearEngine
+                self.engines[entry['name']] = engine_class.load(path)
             except Exception as e:
-                print(f"Translation error: {e}")
-        match, score = process.extractOne(text_to_check, self.all_symptoms)
-        return match, score
+                # The scikit-learn model is still there to fall back on
+                print(f"Error loading engine for {entry['name']}: {e}")
 
-    def predict(self, symptoms_list):
-        self._ensure_loaded()
-        if self.all_symptoms is None:
-            return None
+    def _compile_disease_records(self):
+        # Everything format_response needs, flattened out of pandas once per load
+        import pandas as pd
 
-        # Create feature vector
-        vector = [0] * len(self.all_symptoms)
-        try:
-            symptom_to_index = {str(s).lower().strip(): i for i, s in enumerate(self.all_symptoms)}
-        except Exception as e:
-            print(f"Index creation error: {e}")
-            symptom_to_index = {}
-        
+        def clean(value, default):
+            return default if value is None or (not isinstance(value, str) and pd.isna(value)) else value
+
+        descriptions = {}
+        if self.disease_info is not None:
+            for disease, row in self.disease_info.iterrows():
+                if disease not in descriptions:
+                    descriptions[disease] = tuple(
+                        (lang, clean(row.get(f'description_{lang}', ''), '')) for lang in LANGS)
+
+        severities = {}
+        if self.severity is not None:
+            for disease, row in self.severity.iterrows():
+                severities.setdefault(disease, clean(row.get('severity'), 'Medium'))
+
+        precautions = {}
+        if self.precautions is not None:
+            for _, row in self.precautions.iterrows():
+                items = precautions.setdefault(row['disease'], [])
+                if len(items) < 3:
+                    items.append(tuple(
+                        (lang, clean(row.get(f'precaution_{lang}', DEFAULT_PRECAUTION[lang]), DEFAULT_PRECAUTION[lang]))
+                        for lang in LANGS))
+
+        records = {}
+        for disease in set(descriptions) | set(severities) | set(precautions):
+            records[disease] = DiseaseRecord(
+                descriptions.get(disease, DEFAULT_RECORD.description),
+                severities.get(disease, DEFAULT_RECORD.severity),
+                tuple(precautions.get(disease, ()))
+            )
+        self.disease_records = records
+
+    def _build_alias_index(self):
+        from ml.symptom_index import AliasIndex, normalize_alias
+        vocabulary = {normalize_alias(s): s for s in self.all_symptoms}
+        rows = []
+        if self.symptom_aliases is not None:
+            rows = self.symptom_aliases[['alias', 'symptom', 'language']].itertuples(index=False)
+        self.alias_index = AliasIndex(rows, vocabulary)
+
+    def _build_feature_index(self):
+        # Precomputed once per artifact load instead of on every predict() call
+        self.symptom_to_index = {str(s).lower().strip(): i for i, s in enumerate(self.all_symptoms)}
+
+    def vectorize(self, symptoms_list):
+        """
+        Returns (indices, matched_symptoms): the sorted feature columns set for
+        these symptoms. Patients report a handful of symptoms, so rows are kept
+        as indices and only expanded by features().
+        """
+        indices = set()
         matched_symptoms = []
         for s in symptoms_list:
             s_clean = str(s).lower().strip()
-            if s_clean in symptom_to_index:
-                idx = symptom_to_index[s_clean]
-                vector[idx] = 1
+            idx = self.symptom_to_index.get(s_clean)
+            if idx is not None:
+                indices.add(idx)
                 matched_symptoms.append(s_clean)
             else:
                 print(f"Warning: Symptom '{s}' validated but not found in index.")
-                
-        if not matched_symptoms:
-            return None
-            
-        # Comparison logic
-        comparison = []
-        best_result = None
-        best_score = -1 # Score = Confidence - Penalty
-        
-        # Use all available models
+        return tuple(sorted(indices)), matched_symptoms
+
+    def features(self, rows):
+        """Feature matrix for a list of index tuples, CSR or dense to match the models."""
+        import numpy as np
+        n_features = len(self.all_symptoms)
+        if self.feature_format == 'csr':
+            import scipy.sparse as sp
+            indptr = np.cumsum([0] + [len(r) for r in rows])
+            indices = np.fromiter((i for r in rows for i in r), dtype=np.int32, count=int(indptr[-1]))
+            return sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(rows), n_features))
+        X = np.zeros((len(rows), n_features), dtype=np.float64)
+        for i, r in enumerate(rows):
+            X[i, list(r)] = 1
+        return X
+
+    def model_names(self):
+        return list(self.all_models) if self.all_models else ['Default']
+
+    def execution_plan(self, order):
+        """Model names in the configured order, skipping unknown ones; models not listed run last."""
+        names = self.model_names()
+        planned = [name for name in dict.fromkeys(order) if name in names]
+        return planned + [name for name in names if name not in planned]
+
+    def run_models(self, rows, names=None):
+        """
+        Runs every model (or just those in names) once over rows of feature indices (from vectorize).
+        Returns a list of (name, labels, confidences) with one label/confidence per row.
+        The label is derived from the same predict_proba call as the confidence,
+        so each estimator is evaluated a single time per request.
+        Models with a NumPy engine are scored from the indices directly; the
+        feature matrix is only built if a scikit-learn model still needs it.
+        """
+        import numpy as np
+        outputs = []
+        X = None
+        dense = None
         models_to_run = self.all_models if self.all_models else {'Default': self.model}
-        
-        for name, model in models_to_run.items():
+        for name in (models_to_run if names is None else names):
             try:
-                pred = model.predict([vector])[0]
-                conf = 0.0
-                if hasattr(model, 'predict_proba'):
-                    p = model.predict_proba([vector])[0]
-                    conf = float(max(p)) * 100
+                engine = self.engines.get(name)
+                if engine is not None:
+                    proba = engine.predict_proba(rows)
+                    best = proba.argmax(axis=1)
+                    outputs.append((name, engine.classes_[best], proba[np.arange(len(best)), best] * 100))
+                    continue
+
+                from ml.model_store import predicts_sparse
+                model = models_to_run[name]
+                X = self.features(rows) if X is None else X
+                X_model = X
+                if self.feature_format == 'csr' and not predicts_sparse(model):
+                    # Expanded once, shared by every model that is faster on dense rows
+                    dense = X.toarray() if dense is None else dense
+                    X_model = dense
+                if hasattr(model, 'predict_proba') and hasattr(model, 'classes_'):
+                    proba = model.predict_proba(X_model)
+                    best = proba.argmax(axis=1)
+                    labels = model.classes_[best]
+                    confs = proba[np.arange(len(best)), best] * 100
                 else:
-                    conf = 100.0 if pred else 0.0
-                
-                # Calculate selection score and penalty
-                penalty = 0
-                if 'Decision Tree' in name or 'DecisionTree' in name:
-                    # Penalize DT heavily if it claims 100%, to reflect real-world uncertainty
-                    if conf > 95:
-                        import random
-                        penalty = random.uniform(5.0, 15.0) # Introduce realistic variance
-                    else:
-                        penalty = 5.0
-                elif 'Naive Bayes' in name:
-                    penalty = 2.0
-                
-                # Apply penalty to the actual confidence shown to the user
-                conf = max(0.0, conf - penalty)
-                
-                # Aesthetically boost confidence to account for 100-class probability dilution
-                if conf > 5.0 and conf < 95.0:
-                    conf = 75.0 + (conf / 100.0) * 20.0
-                
-                # Selection score: Favor robust models over simple ones
-                score = conf
-                if 'Random Forest' in name or 'RandomForest' in name:
-                    score += 15.0 # Big bonus to make RF the preferred winner
-                elif 'SVM' in name or 'SVC' in name:
-                    score += 10.0 # Bonus to SVM
-                
-                # Report confidence in comparison
-                comparison.append({
-                    'model': name,
-                    'disease': pred,
-                    'confidence': conf
-                })
-                
-                # Check if this is the best result so far
-                if score > best_score:
-                    best_score = score
-                    best_result = {
-                        'disease': pred,
-                        'confidence': conf, # Return actual adjusted confidence
-                        'model_used': name 
-                    }
+                    labels = model.predict(X_model)
+                    confs = [100.0 if pred else 0.0 for pred in labels]
+                outputs.append((name, labels, confs))
             except Exception as ex:
                 print(f"Error predicting with {name}: {ex}")
-                
+        return outputs
+
+
+class DiseasePredictor:
+    def __init__(self):
+        self.model_path = os.path.join(os.path.dirname(__file__), 'model.pkl')
+        self.data_dir = os.path.join(os.path.dirname(__file__), 'data')
+        from ml.model_store import ARTIFACTS_DIR
+        self.artifacts_dir = ARTIFACTS_DIR
+        self.translation_cache = None
+        self._state = None
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self.last_reload_error = None
+
+        from config import Config
+        from utils.cache import LRUCache
+        # Raw model outputs keyed on (artifact version, sorted symptom indices)
+        self.prediction_cache = LRUCache(maxsize=Config.PREDICTION_CACHE_SIZE)
+
+    def _ensure_loaded(self):
+        if self._state is None:
+            with self._load_lock:
+                if self._state is None:
+                    self.load_artifacts()
+        return self._state
+
+    def get_translation_cache(self):
+        if self.translation_cache is None:
+            from config import Config
+            from ml.translation import build_translation_cache
+            self.translation_cache = build_translation_cache(Config)
+        return self.translation_cache
+
+    def load_artifacts(self):
+        """Loads the current artifacts and swaps them in atomically."""
+        from config import Config
+        state = ArtifactSet(self.model_path, self.artifacts_dir, self.data_dir, Config.NUMPY_ENGINES).load()
+        # A single reference assignment: requests see either the old set or the new one
+        self._state = state
+        self.prediction_cache.clear()
+        return state
+
+    def reload(self, background=True):
+        """
+        Loads the newest artifacts next to the active ones and swaps them in.
+        In-flight requests keep using the set they started with. Returns the
+        loader thread when background=True, otherwise the new version.
+        """
+        def run():
+            if not self._reload_lock.acquire(blocking=False):
+                return None # A reload is already in progress
+            try:
+                previous = self._state.version if self._state else None
+                state = self.load_artifacts()
+                self.last_reload_error = None
+                print(f"Model artifacts reloaded: {previous} -> {state.version}")
+                return state.version
+            except Exception as e:
+                self.last_reload_error = str(e)
+                print(f"Model reload failed, keeping {self.artifact_version}: {e}")
+                return None
+            finally:
+                self._reload_lock.release()
+
+        if not background:
+            return run()
+        thread = threading.Thread(target=run, name='model-reload', daemon=True)
+        thread.start()
+        return thread
+
+    def start_watcher(self, interval):
+        """Polls the artifact directory and hot-reloads when a new version is published."""
+        if self._watcher is not None:
+            return self._watcher
+
+        def watch():
+            from ml.model_store import artifact_fingerprint
+            while True:
+                time.sleep(interval)
+                state = self._state
+                if state is None:
+                    continue # Not loaded yet; the first request will pick up the latest
+                try:
+                    fingerprint = artifact_fingerprint(self.artifacts_dir)
+                    if fingerprint is None and os.path.exists(self.model_path):
+                        stat = os.stat(self.model_path)
+                        fingerprint = f"{int(stat.st_mtime)}-{stat.st_size}"
+                    if fingerprint and fingerprint != state.fingerprint:
+                        self.reload(background=False)
+                except Exception as e:
+                    print(f"Model watcher error: {e}")
+
+        self._watcher = threading.Thread(target=watch, name='model-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    # Read-only views of the active artifact set (None until loaded)
+    def _view(name):
+        return property(lambda self: getattr(self._state, name) if self._state is not None else None)
+
+    model = _view('model')
+    all_models = _view('all_models')
+    all_symptoms = _view('all_symptoms')
+    disease_info = _view('disease_info')
+    symptom_to_index = _view('symptom_to_index')
+    symptom_matcher = _view('symptom_matcher')
+    alias_index = _view('alias_index')
+    disease_records = _view('disease_records')
+    artifact_version = _view('version')
+    feature_format = _view('feature_format')
+    loaded_at = _view('loaded_at')
+    del _view
+
+    def primary_model_class(self):
+        return self._state.primary_model_class() if self._state is not None else None
+
+    def check_symptom(self, user_input, lang='en'):
+        match, score, _ = self.resolve_symptom(user_input, lang)
+        return match, score
+
+    def resolve_symptom(self, user_input, lang='en'):
+        """
+        Maps free text to a known symptom. Returns (match, score, source) where
+        source says which path resolved it: 'alias', 'exact', 'translation' or 'fuzzy'.
+        The alias dictionary is consulted first so common phrases never hit the network.
+        """
+        state = self._ensure_loaded()
+        if not user_input or state.all_symptoms is None:
+            return None, 0, None
+
+        match = state.alias_index.lookup(user_input, lang)
+        if match is not None:
+            return match, 100, 'alias'
+
+        idx = state.symptom_to_index.get(str(user_input).lower().strip())
+        if idx is not None:
+            return state.all_symptoms[idx], 100, 'exact'
+
+        text_to_check = user_input
+        source = 'fuzzy'
+        if lang != 'en':
+            # Cached; falls back to the untranslated text if the backend fails
+            translated = self.get_translation_cache().translate(user_input, source='auto', target='en')
+            if translated:
+                text_to_check = translated
+                source = 'translation'
+                match = state.alias_index.lookup(translated, 'en')
+                if match is not None:
+                    return match, 100, source
+        match, score = state.symptom_matcher.extract_one(text_to_check)
+        return match, score, source
+
+    def _raw_results(self, state, rows):
+        """
+        Raw (name, disease, confidence) tuples per model for each row of feature
+        indices (from vectorize), before any penalty is applied. Symptom sets seen
+        before are served from the prediction cache; only the misses are stacked
+        into one feature matrix and run through the models.
+        Caching pre-penalty outputs keeps the Decision Tree variance per request.
+        Cache entries are (raw, complete); partial ones left by an early exit count as misses here.
+        """
+        keys = [(state.version, row) for row in rows]
+        results = [self.prediction_cache.get(key) for key in keys]
+        results = [entry[0] if entry is not None and entry[1] else None for entry in results]
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            outputs = state.run_models([rows[i] for i in misses])
+            expected = len(state.model_names())
+            for j, i in enumerate(misses):
+                raw = tuple((name, labels[j], float(confs[j])) for name, labels, confs in outputs)
+                results[i] = raw
+                # Only complete results are cached, a failing model may recover
+                if len(raw) == expected:
+                    self.prediction_cache.set(keys[i], (raw, True))
+        return results
+
+    def _planned_results(self, state, row, full_comparison=False):
+        """
+        Raw results for one row, running the models in the configured plan order
+        and stopping early once the result is clear enough (see ENSEMBLE_* in
+        config.py). Returns (raw, early_exit) where early_exit is None when every
+        model ran, else 'confidence', 'agreement' or 'budget'.
+        Outputs already cached for this row are reused and whatever was computed
+        is merged back, tagged complete or partial. Replaying the plan over
+        cached outputs gives the same early exit as a fresh run.
+        """
+        from config import Config
+        names = state.model_names()
+        key = (state.version, row)
+        cached = self.prediction_cache.get(key)
+        known = {result[0]: result for result in cached[0]} if cached is not None else {}
+        early = Config.ENSEMBLE_EARLY_EXIT and not full_comparison
+
+        start = time.perf_counter()
+        raw, votes, ran, early_exit = [], {}, False, None
+        for name in state.execution_plan(Config.ENSEMBLE_PLAN):
+            result = known.get(name)
+            if result is None:
+                outputs = state.run_models([row], names=[name])
+                if not outputs:
+                    continue # The model failed; the rest of the plan still runs
+                _, labels, confs = outputs[0]
+                result = known[name] = (name, labels[0], float(confs[0]))
+                ran = True
+            raw.append(result)
+            votes[result[1]] = votes.get(result[1], 0) + 1
+
+            if not early or len(raw) < Config.ENSEMBLE_MIN_MODELS or len(raw) == len(names):
+                continue
+            if Config.ENSEMBLE_CONFIDENCE and max(r[2] for r in raw) >= Config.ENSEMBLE_CONFIDENCE:
+                early_exit = 'confidence'
+            elif Config.ENSEMBLE_AGREEMENT and max(votes.values()) >= Config.ENSEMBLE_AGREEMENT:
+                early_exit = 'agreement'
+            elif Config.ENSEMBLE_BUDGET_MS and (time.perf_counter() - start) * 1000 >= Config.ENSEMBLE_BUDGET_MS:
+                early_exit = 'budget'
+            if early_exit:
+                break
+
+        if ran:
+            # Failing models are left out, so an entry is only complete once all of them succeeded
+            merged = tuple(known[name] for name in names if name in known)
+            self.prediction_cache.set(key, (merged, len(merged) == len(names)))
+        # Ranked in the models' own order so ties resolve the same as a full run
+        order = {name: i for i, name in enumerate(names)}
+        return tuple(sorted(raw, key=lambda r: order[r[0]])), early_exit
+
+    def _rank(self, raw_results):
+        """
+        Applies the per-model penalty/boost rules to raw (name, disease, confidence)
+        results and picks the winner. Returns (best_result, comparison).
+        """
+        comparison = []
+        best_result = None
+        best_score = -1 # Score = Confidence - Penalty
+
+        for name, pred, conf in raw_results:
+            conf = float(conf)
+
+            # Calculate selection score and penalty
+            penalty = 0
+            if 'Decision Tree' in name or 'DecisionTree' in name:
+                # Penalize DT heavily if it claims 100%, to reflect real-world uncertainty
+                if conf > 95:
+                    import random
+                    penalty = random.uniform(5.0, 15.0) # Introduce realistic variance
+                else:
+                    penalty = 5.0
+            elif 'Naive Bayes' in name:
+                penalty = 2.0
+
+            # Apply penalty to the actual confidence shown to the user
+            conf = max(0.0, conf - penalty)
+
+            # Aesthetically boost confidence to account for 100-class probability dilution
+            if conf > 5.0 and conf < 95.0:
+                conf = 75.0 + (conf / 100.0) * 20.0
+
+            # Selection score: Favor robust models over simple ones
+            score = conf
+            if 'Random Forest' in name or 'RandomForest' in name:
+                score += 15.0 # Big bonus to make RF the preferred winner
+            elif 'SVM' in name or 'SVC' in name:
+                score += 10.0 # Bonus to SVM
+
+            # Report confidence in comparison
+            comparison.append({
+                'model': name,
+                'disease': pred,
+                'confidence': conf
+            })
+
+            # Check if this is the best result so far
+            if score > best_score:
+                best_score = score
+                best_result = {
+                    'disease': pred,
+                    'confidence': conf, # Return actual adjusted confidence
+                    'model_used': name
+                }
+
         # Sort comparison by confidence descending
         comparison.sort(key=lambda x: x['confidence'], reverse=True)
-        
+        return best_result, comparison
+
+    def predict(self, symptoms_list, full_comparison=False):
+        """
+        Best guess for a list of symptoms. Models run cheapest first and stop
+        early once the answer is clear (see _planned_results); full_comparison
+        runs every model, for clients that show the comparison table.
+        """
+        # Captured once: a concurrent reload can't change models mid-request
+        state = self._ensure_loaded()
+        if state.all_symptoms is None:
+            return None
+
+        # Feature indices from the precomputed index
+        row, matched_symptoms = state.vectorize(symptoms_list)
+        if not matched_symptoms:
+            return None
+
+        # At most one predict_proba pass per model, reusing cached outputs for this symptom set
+        raw_results, early_exit = self._planned_results(state, row, full_comparison)
+        best_result, comparison = self._rank(raw_results)
+
         # If no valid results found
         if not best_result:
             return None
@@ -159,44 +583,87 @@ class DiseasePredictor:
             best_result['disease'], 
             best_result['confidence'], 
             matched_symptoms, 
-            comparison
+            comparison,
+            state=state,
+            model_used=best_result['model_used'],
+            models_run=[r[0] for r in raw_results],
+            early_exit=early_exit
         )
 
-    def format_response(self, disease, confidence, matched_symptoms, comparison=None):
-        # Fetch details
-        desc = {}
-        if self.disease_info is not None and disease in self.disease_info.index:
-            desc = self.disease_info.loc[disease]
-            
-        sev = 'Medium'
-        if self.severity is not None and disease in self.severity.index:
-            sev = self.severity.loc[disease]['severity']
-        
-        # Get precautions
-        precaution_list = []
-        if self.precautions is not None:
-            prec_rows = self.precautions[self.precautions['disease'] == disease]
-            if not prec_rows.empty:
-                for index, row in prec_rows.head(3).iterrows():
-                    p = {
-                        'en': row.get('precaution_en', 'Consult a doctor'),
-                        'hi': row.get('precaution_hi', 'डॉक्टर से सलाह लें'),
-                        'ta': row.get('precaution_ta', 'மருத்துவரை அணுகவும்')
-                    }
-                    precaution_list.append(p)
+    def predict_batch(self, symptom_sets):
+        """
+        Predicts many symptom sets at once. All sets are stacked into one feature
+        matrix so every model runs a single time over the whole batch.
+        Returns one entry per input: a format_response() dict, or {'error': ...}
+        for rows that could not be predicted. Either carries 'unknown_symptoms'
+        when some of the row's symptoms are not in the index.
+        Rows whose symptom set is already cached skip the models entirely.
+        """
+        state = self._ensure_loaded()
+        if state.all_symptoms is None:
+            return [{'error': 'Model not loaded'} for _ in symptom_sets]
+
+        results = [None] * len(symptom_sets)
+        rows = []
+        feature_rows = []
+        matched = []
+        unknown = {}
+        for i, symptoms in enumerate(symptom_sets):
+            if not isinstance(symptoms, list) or not symptoms:
+                results[i] = {'error': 'No symptoms provided'}
+                continue
+            row, matched_symptoms = state.vectorize(symptoms)
+            unknown_symptoms = [str(s) for s in symptoms if str(s).lower().strip() not in state.symptom_to_index]
+            if not matched_symptoms:
+                results[i] = {
+                    'error': 'Could not make a prediction based on provided symptoms',
+                    'unknown_symptoms': unknown_symptoms
+                }
+                continue
+            if unknown_symptoms:
+                unknown[i] = unknown_symptoms # Predicted from the known ones, reported back
+            rows.append(i)
+            feature_rows.append(row)
+            matched.append(matched_symptoms)
+
+        if not rows:
+            return results
+
+        raw_batch = self._raw_results(state, feature_rows)
+        for j, i in enumerate(rows):
+            best_result, comparison = self._rank(raw_batch[j])
+            if not best_result:
+                results[i] = {'error': 'Could not make a prediction based on provided symptoms'}
+            else:
+                results[i] = self.format_response(
+                    best_result['disease'],
+                    best_result['confidence'],
+                    matched[j],
+                    comparison,
+                    state=state,
+                    model_used=best_result['model_used'],
+                    models_run=[r[0] for r in raw_batch[j]]
+                )
+            if i in unknown:
+                results[i]['unknown_symptoms'] = unknown[i]
+        return results
 
+    def format_response(self, disease, confidence, matched_symptoms, comparison=None, state=None, model_used=None,
+                        models_run=None, early_exit=None):
+        # O(1) lookup into the precompiled records; fresh dicts so callers can't mutate them
+        state = state or self._ensure_loaded()
+        record = state.disease_records.get(disease, DEFAULT_RECORD)
         return {
             'disease': disease,
             'confidence': confidence,
-            'severity': sev,
-            'description': {
-                'en': desc.get('description_en', '') if hasattr(desc, 'get') else '',
-                'hi': desc.get('description_hi', '') if hasattr(desc, 'get') else '',
-                'ta': desc.get('description_ta', '') if hasattr(desc, 'get') else ''
-            },
-            'precautions': precaution_list,
+            'severity': record.severity,
+            'description': dict(record.description),
+            'precautions': [dict(p) for p in record.precautions],
             'matched_symptoms': matched_symptoms,
-            'comparison': comparison or []
+            'comparison': comparison or [],
+            'model_used': model_used,
+            'models_run': models_run or [c['model'] for c in comparison or []],
+            'early_exit': early_exit
         }
 
 # Global instance
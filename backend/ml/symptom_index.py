@@ -0,0 +1,141 @@
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+from fuzzywuzzy import fuzz, utils
+
+
+class SymptomMatcher:
+    """
+    Fuzzy symptom lookup backed by a character n-gram index.
+
+    Gives the same (match, score) as fuzzywuzzy.process.extractOne with its
+    default processor and WRatio scorer, but only scores a short list of
+    candidates that share n-grams with the input instead of every symptom.
+    """
+
+    def __init__(self, choices, ngram_size=3, shortlist_size=32, exhaustive_limit=5000):
+        self.choices = list(choices)
+        self.ngram_size = ngram_size
+        self.shortlist_size = shortlist_size
+        # When the input shares no n-gram with any symptom (gibberish, untranslated text)
+        # small vocabularies are still scanned fully so results match extractOne exactly.
+        # Larger ones report no match instead of paying for a linear scan.
+        self.exhaustive_limit = exhaustive_limit
+
+        # Choices are processed exactly once, the way extractOne processes them per call
+        self.processed = [utils.full_process(c, force_ascii=True) for c in self.choices]
+
+        self.exact = {}
+        postings = defaultdict(list)
+        self.gram_counts = np.zeros(len(self.choices), dtype=np.int32)
+        for i, text in enumerate(self.processed):
+            self.exact.setdefault(text, i)
+            grams = self._grams(text)
+            self.gram_counts[i] = len(grams)
+            for g in grams:
+                postings[g].append(i)
+        self.postings = {g: np.array(ids, dtype=np.int32) for g, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.choices)
+
+    def _grams(self, text):
+        padded = f" {text} "
+        n = self.ngram_size
+        return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+    def _process_query(self, query):
+        # extractOne runs the default processor and then full_process(force_ascii=True)
+        return utils.full_process(utils.full_process(query), force_ascii=True)
+
+    def _shortlist(self, processed_query):
+        grams = self._grams(processed_query)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not lists:
+            return None
+        ids, counts = np.unique(np.concatenate(lists), return_counts=True)
+        if len(ids) > self.shortlist_size:
+            # Rank by shared n-grams, breaking ties with the Dice coefficient
+            dice = 2.0 * counts / (len(grams) + self.gram_counts[ids])
+            rank = counts + dice * 0.999
+            top = np.argpartition(-rank, self.shortlist_size - 1)[:self.shortlist_size]
+            ids = np.sort(ids[top])
+        return ids
+
+    def _score(self, processed_query, candidate_ids):
+        best_idx, best_score = None, -1
+        for i in candidate_ids:
+            score = fuzz.WRatio(processed_query, self.processed[i], full_process=False)
+            # Strict '>' keeps the first choice on ties, like extractOne
+            if score > best_score:
+                best_idx, best_score = i, score
+        return best_idx, best_score
+
+    def extract_one(self, query):
+        if not self.choices:
+            return None, 0
+
+        processed_query = self._process_query(query)
+        if not processed_query:
+            # Every choice scores 0, extractOne returns the first one
+            return self.choices[0], 0
+
+        idx = self.exact.get(processed_query)
+        if idx is not None:
+            return self.choices[idx], 100
+
+        candidates = self._shortlist(processed_query)
+        if candidates is None:
+            if len(self.choices) > self.exhaustive_limit:
+                return None, 0
+            candidates = range(len(self.choices))
+
+        idx, score = self._score(processed_query, candidates)
+        return self.choices[int(idx)], score
+
+
+ALIAS_PUNCTUATION = '.,!?;:।॥"\''
+
+
+def normalize_alias(text):
+    """NFKC + case folding + collapsed whitespace, so typed variants of a phrase hash alike."""
+    text = unicodedata.normalize('NFKC', str(text)).casefold()
+    return ' '.join(text.split()).strip(ALIAS_PUNCTUATION + ' ')
+
+
+class AliasIndex:
+    """
+    Per-language hash index from normalized alias to canonical symptom,
+    built from symptom_aliases.csv. Lookups are a dict hit, with no
+    translation or fuzzy scoring involved.
+    """
+
+    def __init__(self, rows, vocabulary):
+        # vocabulary maps normalized symptom -> canonical symptom as known to the model
+        self.by_language = {}
+        for alias, symptom, language in rows:
+            key = normalize_alias(alias)
+            target = vocabulary.get(normalize_alias(symptom))
+            if not key or target is None:
+                continue
+            table = self.by_language.setdefault(str(language).strip().lower(), {})
+            # Several rows can share an alias; prefer the one naming itself, else the first
+            if key not in table or key == normalize_alias(target):
+                table[key] = target
+
+    def __len__(self):
+        return sum(len(t) for t in self.by_language.values())
+
+    def lookup(self, text, lang='en'):
+        key = normalize_alias(text)
+        if not key:
+            return None
+        table = self.by_language.get(lang)
+        if table and key in table:
+            return table[key]
+        # Users often mix languages (e.g. typing "fever" with Hindi selected)
+        for other, table in self.by_language.items():
+            if other != lang and key in table:
+                return table[key]
+        return None
@@ -0,0 +1,63 @@
+"""
+Synthetic disease catalogues for testing training and inference at scale.
+
+    python ml/synthetic.py <out_dir> [n_diseases] [n_symptoms]
+
+writes the disease CSVs in the layout of ml/data, e.g. for
+`python ml/train_model.py --data-dir <out_dir> --artifacts-dir <dir>`.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+def make_catalogue(n_diseases=4000, n_symptoms=20000, symptoms_per_disease=(4, 10), common=200, seed=0):
+    """
+    (disease, symptom) pairs like disease_symptoms.csv. Each disease gets
+    1-2 symptoms from a small common pool (Zipf weighted, like fever or
+    headache in the real data) and the rest from a shuffled cycle over the
+    whole vocabulary, so every symptom is used once there are enough slots
+    (about n_symptoms / (mean symptoms per disease - 1.5) diseases).
+    """
+    rng = np.random.default_rng(seed)
+    low, high = symptoms_per_disease
+    counts = rng.integers(low, high + 1, size=n_diseases)
+    common = min(common, n_symptoms)
+    weights = 1.0 / np.arange(1, common + 1) ** 1.1
+    weights /= weights.sum()
+    cycle = rng.permutation(n_symptoms)
+    position = 0
+
+    diseases, symptoms = [], []
+    for d, k in enumerate(counts):
+        k = min(int(k), n_symptoms)
+        n_common = min(k - 1, int(rng.integers(1, 3)))
+        chosen = set(rng.choice(common, size=n_common, replace=False, p=weights).tolist())
+        while len(chosen) < k:
+            chosen.add(int(cycle[position % n_symptoms]))
+            position += 1
+        for s in sorted(chosen):
+            diseases.append(f"disease_{d:05d}")
+            symptoms.append(f"symptom_{s:05d}")
+    return pd.DataFrame({'disease': diseases, 'symptom': symptoms})
+
+
+def write_dataset(directory, df_symptoms):
+    """Writes a data folder in the layout of ml/data, usable for training and by the predictor."""
+    os.makedirs(directory, exist_ok=True)
+    df_symptoms.to_csv(os.path.join(directory, 'disease_symptoms.csv'), index=False)
+    diseases = pd.DataFrame({'disease': sorted(df_symptoms['disease'].unique())})
+    diseases.assign(description_en='Synthetic disease').to_csv(os.path.join(directory, 'disease_info.csv'), index=False)
+    diseases.assign(severity='Medium').to_csv(os.path.join(directory, 'disease_severity.csv'), index=False)
+    diseases.assign(precaution_en='Consult a doctor').to_csv(os.path.join(directory, 'disease_precautions.csv'), index=False)
+
+
+if __name__ == "__main__":
+    out_dir = sys.argv[1]
+    n_diseases = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    n_symptoms = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+    df = make_catalogue(n_diseases, n_symptoms)
+    write_dataset(out_dir, df)
+    print(f"{df['disease'].nunique()} diseases, {df['symptom'].nunique()} symptoms, {len(df)} pairs written to {out_dir}")
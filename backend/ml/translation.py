@@ -0,0 +1,234 @@
+import os
+import sqlite3
+import threading
+import time
+
+from ml.symptom_index import normalize_alias
+from utils.cache import LRUCache
+
+
+class Translator:
+    """Interface for translation backends used by TranslationCache."""
+    name = 'base'
+
+    def translate(self, text, source='auto', target='en'):
+        raise NotImplementedError
+
+
+class GoogleTranslatorBackend(Translator):
+    """deep_translator's GoogleTranslator."""
+    name = 'google'
+
+    def translate(self, text, source='auto', target='en'):
+        from deep_translator import GoogleTranslator
+        # A new client per call: translate() keeps the text in the client's shared
+        # request params, so a client reused across threads can answer for another
+        # caller's text. Construction is free next to the HTTP round-trip.
+        return GoogleTranslator(source=source, target=target).translate(text)
+
+
+class DictionaryTranslator(Translator):
+    """
+    Offline stand-in backed by a plain dict of {(lang, text): translation}.
+    Used in benchmarks, tests and deployments without network access.
+    `delay` (seconds) simulates the latency of a remote service.
+    """
+    name = 'dictionary'
+
+    def __init__(self, entries=None, delay=0.0):
+        self.entries = {}
+        self.delay = delay
+        self.calls = 0
+        for (lang, text), translation in (entries or {}).items():
+            self.entries[(lang, normalize_alias(text))] = translation
+
+    @classmethod
+    def from_aliases(cls, rows, delay=0.0):
+        # rows: (alias, symptom, language) as in symptom_aliases.csv
+        return cls({(str(lang), alias): symptom for alias, symptom, lang in rows}, delay=delay)
+
+    def translate(self, text, source='auto', target='en'):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        key = normalize_alias(text)
+        if (source, key) in self.entries:
+            return self.entries[(source, key)]
+        for (lang, entry), translation in self.entries.items():
+            if entry == key:
+                return translation
+        raise LookupError(f"No offline translation for '{text}'")
+
+
+class TranslationCache:
+    """
+    Two-tier translation cache: an in-process LRU in front of a SQLite table
+    that every gunicorn worker on the host shares. Entries expire after `ttl`
+    seconds and the table is trimmed to `max_rows` least recently used rows.
+    Failed translations are never cached.
+    """
+
+    TRIM_EVERY = 100  # writes between size checks on the persistent table
+
+    def __init__(self, translator, db_path=None, memory_size=2048, ttl=30 * 24 * 3600, max_rows=50000):
+        self.translator = translator
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.memory = LRUCache(maxsize=memory_size, ttl=ttl)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._schema_ready = False
+        self.disk_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.disk_evictions = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        if not self._schema_ready:
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS translations (
+                        source_lang TEXT NOT NULL,
+                        target_lang TEXT NOT NULL,
+                        text TEXT NOT NULL,
+                        translated TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_used REAL NOT NULL,
+                        PRIMARY KEY (source_lang, target_lang, text)
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)')
+            self._schema_ready = True
+        return conn
+
+    def _disk_get(self, key):
+        if not self.db_path:
+            return None
+        source, target, text = key
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT translated, created_at FROM translations WHERE source_lang = ? AND target_lang = ? AND text = ?',
+            (source, target, text)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        with conn:
+            if self.ttl and row[1] + self.ttl <= now:
+                conn.execute('DELETE FROM translations WHERE source_lang = ? AND target_lang = ? AND text = ?',
+                             (source, target, text))
+                return None
+            conn.execute('UPDATE translations SET last_used = ? WHERE source_lang = ? AND target_lang = ? AND text = ?',
+                         (now, source, target, text))
+        return row[0]
+
+    def _disk_set(self, key, translated):
+        if not self.db_path:
+            return
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)', key + (translated, now, now))
+        with self._lock:
+            self._writes += 1
+            trim = self._writes % self.TRIM_EVERY == 0
+        if trim:
+            self._trim(conn)
+
+    def _trim(self, conn):
+        with conn:
+            if self.ttl:
+                cur = conn.execute('DELETE FROM translations WHERE created_at <= ?', (time.time() - self.ttl,))
+                self.disk_evictions += cur.rowcount
+            count = conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+            if count > self.max_rows:
+                cur = conn.execute('''
+                    DELETE FROM translations WHERE rowid IN (
+                        SELECT rowid FROM translations ORDER BY last_used ASC LIMIT ?
+                    )
+                ''', (count - self.max_rows,))
+                self.disk_evictions += cur.rowcount
+
+    def translate(self, text, source='auto', target='en'):
+        """Returns the translation, or None if the backend failed."""
+        key = (source, target, normalize_alias(text))
+        translated = self.memory.get(key)
+        if translated is not None:
+            return translated
+
+        try:
+            translated = self._disk_get(key)
+        except sqlite3.Error as e:
+            print(f"Translation cache read error: {e}")
+            translated = None
+        if translated is not None:
+            self.disk_hits += 1
+            self.memory.set(key, translated)
+            return translated
+
+        self.misses += 1
+        try:
+            translated = self.translator.translate(text, source=source, target=target)
+        except Exception as e:
+            self.errors += 1
+            print(f"Translation error: {e}")
+            return None
+        if not translated:
+            self.errors += 1
+            return None
+
+        self.memory.set(key, translated)
+        try:
+            self._disk_set(key, translated)
+        except sqlite3.Error as e:
+            print(f"Translation cache write error: {e}")
+        return translated
+
+    def clear(self):
+        self.memory.clear()
+        if self.db_path:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM translations')
+
+    def stats(self):
+        memory = self.memory.stats()
+        lookups = memory['hits'] + self.disk_hits + self.misses
+        return {
+            'backend': self.translator.name,
+            'memory': memory,
+            'memory_hits': memory['hits'],
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'disk_evictions': self.disk_evictions,
+            'hit_rate': round((memory['hits'] + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+def build_translation_cache(config):
+    """Creates the TranslationCache described by a Config object."""
+    backend = getattr(config, 'TRANSLATOR_BACKEND', 'google')
+    if backend == 'dictionary':
+        import csv
+        path = os.path.join(os.path.dirname(__file__), 'data', 'symptom_aliases.csv')
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            rows = [(r['alias'], r['symptom'], r['language']) for r in csv.DictReader(f)]
+        translator = DictionaryTranslator.from_aliases(rows)
+    else:
+        translator = GoogleTranslatorBackend()
+    return TranslationCache(
+        translator,
+        db_path=config.TRANSLATION_CACHE_PATH,
+        memory_size=config.TRANSLATION_CACHE_SIZE,
+        ttl=config.TRANSLATION_CACHE_TTL,
+        max_rows=config.TRANSLATION_CACHE_MAX_ROWS
+    )
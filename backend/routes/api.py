@@ -1,11 +1,23 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, make_response, current_app, Response, send_file
 from ml.predictor import predictor
 from flask_login import login_required, current_user
 from database import get_chat_history, save_chat_message
+import csv
 import datetime
+import gzip
+import hashlib
+import json
+import os
+import threading
 
 api_bp = Blueprint('api', __name__)
 
+def _json_flag(value):
+    # A JSON true, or a string spelled like the query-string flags; "false", "0", 1 etc. are off
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return value is True
+
 @api_bp.route('/predict', methods=['POST'])
 def predict():
     data = request.json
@@ -15,7 +27,8 @@ def predict():
         return jsonify({'error': 'No symptoms provided'}), 400
         
     try:
-        result = predictor.predict(symptoms)
+        # Every model runs only when asked for; otherwise the ensemble may stop early
+        result = predictor.predict(symptoms, full_comparison=_json_flag(data.get('full_comparison')))
         if not result:
             return jsonify({'error': 'Could not make a prediction based on provided symptoms'}), 404
             
@@ -23,26 +36,46 @@ def predict():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    data = request.json or {}
+    symptom_sets = data.get('symptom_sets', [])
+
+    if not isinstance(symptom_sets, list) or not symptom_sets:
+        return jsonify({'error': 'No symptom sets provided'}), 400
+
+    max_batch = current_app.config.get('MAX_BATCH_SIZE', 500)
+    if len(symptom_sets) > max_batch:
+        return jsonify({'error': f'Batch too large (max {max_batch} symptom sets)'}), 413
+
+    try:
+        results = predictor.predict_batch(symptom_sets)
+        return jsonify({'results': results, 'count': len(results), 'success': True})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/validate', methods=['POST'])
 def validate_symptom():
     data = request.json
     text = data.get('text', '')
     lang = data.get('lang', 'en')
     
-    match, score = predictor.check_symptom(text, lang)
+    match, score, source = predictor.resolve_symptom(text, lang)
     
     # Threshold for acceptance
     if score > 70:
         return jsonify({
             'valid': True, 
             'match': match,
-            'score': score
+            'score': score,
+            'source': source
         })
     else:
         return jsonify({
             'valid': False,
             'match': match, # Return best guess anyway
-            'score': score
+            'score': score,
+            'source': source
         })
 
 @api_bp.route('/info', methods=['GET'])
@@ -51,15 +84,13 @@ def sys_info():
     disease_count = len(predictor.disease_info) if predictor.disease_info is not None else 0
     symptom_count = len(predictor.all_symptoms) if predictor.all_symptoms is not None else 0
     
-    # Get dynamic model name
-    model_name = "Unknown"
-    if predictor.model:
-        model_name = predictor.model.__class__.__name__
-        # Clean up name
-        if model_name == 'LogisticRegression': model_name = 'Logistic Regression'
-        elif model_name == 'DecisionTreeClassifier': model_name = 'Decision Tree'
-        elif model_name == 'RandomForestClassifier': model_name = 'Random Forest'
-        elif model_name == 'MultinomialNB': model_name = 'Naive Bayes'
+    # Get dynamic model name (from the manifest, so this doesn't force a model load)
+    model_name = predictor.primary_model_class() or "Unknown"
+    # Clean up name
+    if model_name == 'LogisticRegression': model_name = 'Logistic Regression'
+    elif model_name == 'DecisionTreeClassifier': model_name = 'Decision Tree'
+    elif model_name == 'RandomForestClassifier': model_name = 'Random Forest'
+    elif model_name == 'MultinomialNB': model_name = 'Naive Bayes'
 
     return jsonify({
         'model': model_name, 
@@ -67,12 +98,91 @@ def sys_info():
         'diseases': disease_count,
         'symptoms': symptom_count,
         'status': 'active',
+        'artifact_version': predictor.artifact_version,
+        'feature_format': predictor.feature_format,
+        'loaded_at': predictor.loaded_at.isoformat() if predictor.loaded_at else None,
         'timestamp': datetime.datetime.now().isoformat()
     })
 
-from utils.pdf_gen import generate_pdf
+def _admin_token_error():
+    # None if the request carries the configured X-Admin-Token, else the error response to return
+    import hmac
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        return jsonify({'error': 'Admin endpoint disabled'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({'error': 'Invalid admin token'}), 401
+    return None
+
+@api_bp.route('/admin/reload', methods=['POST'])
+def reload_model():
+    error = _admin_token_error()
+    if error:
+        return error
+
+    # ?version=<dir> re-points ml/artifacts/CURRENT (e.g. a rollback); every worker's
+    # watcher follows CURRENT. Without it, this worker reloads whatever CURRENT names.
+    version = request.args.get('version') or (request.get_json(silent=True) or {}).get('version')
+    if version:
+        from ml.model_store import publish_version
+        if os.path.basename(version) != version or version.startswith('.'):
+            return jsonify({'error': 'Invalid artifact version'}), 400
+        try:
+            publish_version(predictor.artifacts_dir, version)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 404
+
+    # Only this process reloads here; the other workers pick CURRENT up within MODEL_WATCH_INTERVAL
+    interval = current_app.config.get('MODEL_WATCH_INTERVAL', 0)
+    scope = {'scope': 'worker', 'other_workers': f"follow CURRENT within {interval:g}s" if interval > 0
+             else 'not reloaded (MODEL_WATCH_INTERVAL is 0), restart them'}
+
+    previous = predictor.artifact_version
+    if request.args.get('wait') in ('1', 'true'):
+        loaded = predictor.reload(background=False)
+        if loaded is None:
+            return jsonify({'success': False, 'error': predictor.last_reload_error or 'Reload already in progress',
+                            'artifact_version': predictor.artifact_version}), 409
+        return jsonify(dict(scope, success=True, previous_version=previous, artifact_version=loaded,
+                            loaded_at=predictor.loaded_at.isoformat()))
+
+    # Load in the background; requests keep being served by the current version
+    predictor.reload(background=True)
+    return jsonify(dict(scope, success=True, reloading=True, artifact_version=previous)), 202
+
+@api_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    stats = {
+        'prediction': dict(predictor.prediction_cache.stats(), artifact_version=predictor.artifact_version)
+    }
+    if predictor.translation_cache is not None:
+        stats['translation'] = predictor.translation_cache.stats()
+    if _report_cache is not None:
+        stats['reports'] = _report_cache.stats()
+    if _report_jobs is not None:
+        stats['report_jobs'] = _report_jobs.stats()
+    from database import message_queue_stats, user_cache_stats
+    stats['users'] = user_cache_stats()
+    queue_stats = message_queue_stats()
+    if queue_stats is not None:
+        stats['chat_write_queue'] = queue_stats
+    return jsonify(stats)
+
+from utils.report_cache import ReportCache, iter_chunks
 from flask import make_response
 
+_report_cache = None
+
+def get_report_cache():
+    global _report_cache
+    if _report_cache is None:
+        _report_cache = ReportCache(
+            max_bytes=current_app.config.get('REPORT_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+            disk_dir=current_app.config.get('REPORT_CACHE_DIR'),
+            disk_max_bytes=current_app.config.get('REPORT_CACHE_DISK_MAX_BYTES', 256 * 1024 * 1024)
+        )
+    return _report_cache
+
 @api_bp.route('/report', methods=['POST'])
 def download_report():
     data = request.json
@@ -81,29 +191,145 @@ def download_report():
     
     if not prediction_data:
         return jsonify({'error': 'No prediction data provided'}), 400
-        
-    pdf_bytes = generate_pdf(user_name, prediction_data)
+
+    key, pdf_bytes = get_report_cache().get_or_render(user_name, prediction_data)
     
-    response = make_response(pdf_bytes)
-    response.headers['Content-Type'] = 'application/pdf'
+    response = Response(iter_chunks(pdf_bytes), mimetype='application/pdf')
+    response.headers['Content-Length'] = str(len(pdf_bytes))
     response.headers['Content-Disposition'] = f'attachment; filename=report.pdf'
+    response.headers['Cache-Control'] = 'private, no-store'
+    response.set_etag(key) # Same report content, same tag
     return response
-@api_bp.route('/symptoms', methods=['GET'])
-def get_symptoms():
-    import csv, os
+_report_jobs = None
+
+def get_report_jobs():
+    global _report_jobs
+    if _report_jobs is None:
+        from utils.report_jobs import ReportJobQueue
+        _report_jobs = ReportJobQueue(
+            current_app.config.get('REPORT_JOBS_DIR'),
+            max_workers=current_app.config.get('REPORT_JOB_WORKERS', 2),
+            max_pending=current_app.config.get('REPORT_JOB_MAX_PENDING', 32),
+            ttl=current_app.config.get('REPORT_JOB_TTL', 3600),
+            executor=current_app.config.get('REPORT_JOB_EXECUTOR', 'process'),
+            cache=get_report_cache()
+        )
+    return _report_jobs
+
+def _job_response(job):
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'error': job.get('error'),
+        'status_url': f"/api/report/jobs/{job['id']}",
+        'download_url': f"/api/report/jobs/{job['id']}/download" if job['status'] == 'done' else None
+    }
+
+@api_bp.route('/report/jobs', methods=['POST'])
+def create_report_job():
+    # Same body as /report; returns 202 right away and renders in the background
+    from utils.pdf_gen import report_fields
+    from utils.report_jobs import JobQueueFull
+    data = request.json or {}
+    prediction_data = data.get('prediction_data')
+    if not prediction_data:
+        return jsonify({'error': 'No prediction data provided'}), 400
     try:
+        fields = report_fields(data.get('user_name', 'Guest'), prediction_data)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return jsonify({'error': f'Invalid prediction data: {e}'}), 400
+
+    try:
+        job = get_report_jobs().submit(fields)
+    except JobQueueFull as e:
+        response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    return jsonify(_job_response(job)), 202
+
+@api_bp.route('/report/jobs/<job_id>', methods=['GET'])
+def report_job_status(job_id):
+    job = get_report_jobs().status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    response = jsonify(_job_response(job))
+    response.headers['Cache-Control'] = 'no-store'
+    if job['status'] == 'queued':
+        response.headers['Retry-After'] = '1'
+    return response
+
+@api_bp.route('/report/jobs/<job_id>/download', methods=['GET'])
+def report_job_download(job_id):
+    jobs = get_report_jobs()
+    job = jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job['status'] != 'done':
+        return jsonify(_job_response(job)), 409
+    response = send_file(jobs.result_path(job_id), mimetype='application/pdf',
+                         as_attachment=True, download_name='report.pdf', conditional=False)
+    response.headers['Cache-Control'] = 'private, no-store'
+    response.set_etag(job['key'])
+    return response
+
+SYMPTOMS_FILE = os.path.join(os.path.dirname(__file__), '..', 'ml', 'data', 'disease_symptoms.csv')
+_symptoms_lock = threading.Lock()
+_symptoms_payload = None
+
+def _load_symptoms_payload():
+    """
+    The /api/symptoms body, built once per version of the data file: JSON bytes,
+    a gzipped copy and a strong ETag for each. Rebuilt when the file's mtime or size changes.
+    """
+    global _symptoms_payload
+    stat = os.stat(SYMPTOMS_FILE)
+    key = (stat.st_mtime_ns, stat.st_size)
+    payload = _symptoms_payload
+    if payload is not None and payload['key'] == key:
+        return payload
+    with _symptoms_lock:
+        if _symptoms_payload is not None and _symptoms_payload['key'] == key:
+            return _symptoms_payload
         # Fast load bypassing 8MB ML model so Render Free Tier doesn't crash on initial page load
-        symptoms_file = os.path.join(os.path.dirname(__file__), '..', 'ml', 'data', 'disease_symptoms.csv')
         symptoms = set()
-        with open(symptoms_file, 'r', encoding='utf-8') as f:
+        with open(SYMPTOMS_FILE, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
                 s = row.get('symptom')
                 if s: symptoms.add(s.strip())
-        return jsonify({'symptoms': sorted(list(symptoms)), 'success': True})
+        body = json.dumps({'symptoms': sorted(symptoms), 'success': True}, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        _symptoms_payload = {
+            'key': key,
+            'body': body,
+            'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+            # Each encoding is a different representation, so each gets its own strong tag
+            'etag': digest,
+            'gzip_etag': digest + '-gz'
+        }
+        return _symptoms_payload
+
+@api_bp.route('/symptoms', methods=['GET'])
+def get_symptoms():
+    try:
+        payload = _load_symptoms_payload()
     except Exception as e:
         return jsonify({'symptoms': [], 'success': False, 'error': str(e)})
 
+    use_gzip = request.accept_encodings['gzip'] > 0
+    etag = payload['gzip_etag'] if use_gzip else payload['etag']
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(payload['gzip'] if use_gzip else payload['body'], mimetype='application/json')
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config.get('SYMPTOMS_MAX_AGE', 3600)}"
+    return response
+
 @api_bp.route('/chat/diagnoses', methods=['GET'])
 @login_required
 def get_diagnoses():
@@ -115,13 +341,37 @@ def get_diagnoses():
         print(f"Error fetching diagnoses: {e}")
         return jsonify([])
 
+def _wants_all():
+    # Old clients get the whole, unpaginated list with ?all=1
+    return request.args.get('all', '').lower() in ('1', 'true', 'yes')
+
+def _page_args():
+    # (limit, cursor) from the query string; raises ValueError on bad input
+    # (the cursor itself is checked when the page query decodes it)
+    limit = request.args.get('limit', current_app.config.get('PAGE_SIZE', 50))
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    limit = min(limit, current_app.config.get('MAX_PAGE_SIZE', 500))
+    return limit, request.args.get('cursor') or None
+
 @api_bp.route('/sessions', methods=['GET'])
 @login_required
 def get_sessions():
     try:
-        from database import get_user_sessions
-        sessions = get_user_sessions(current_user.id)
-        return jsonify([dict(s) for s in sessions]) # Convert Row objects to dict
+        if _wants_all():
+            from database import get_user_sessions
+            sessions = get_user_sessions(current_user.id)
+            return jsonify([dict(s) for s in sessions]) # Convert Row objects to dict
+        limit, cursor = _page_args()
+        from database import get_user_sessions_page
+        sessions, next_cursor = get_user_sessions_page(current_user.id, limit, cursor)
+        return jsonify({'sessions': sessions, 'next_cursor': next_cursor, 'success': True})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error fetching sessions: {e}")
         return jsonify([])
@@ -154,15 +404,71 @@ def delete_user_session(session_id):
 @login_required
 def get_session_chat(session_id):
     try:
-        from database import get_session_messages
-        messages = get_session_messages(session_id)
-        return jsonify([dict(m) for m in messages])
+        if _wants_all():
+            from database import get_session_messages
+            messages = get_session_messages(session_id)
+            return jsonify([dict(m) for m in messages])
+        limit, cursor = _page_args()
+        from database import get_session_messages_page
+        messages, next_cursor = get_session_messages_page(session_id, limit, cursor)
+        return jsonify({'messages': messages, 'next_cursor': next_cursor, 'success': True})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error fetching session messages: {e}")
         return jsonify([])
+
+@api_bp.route('/chat/history', methods=['GET'])
+@login_required
 def get_history():
-    history = get_chat_history(current_user.id)
-    return jsonify({'history': history, 'success': True})
+    # Oldest first, one page at a time; ?all=1 returns everything as before
+    if _wants_all():
+        history = get_chat_history(current_user.id)
+        return jsonify({'history': history, 'success': True})
+    try:
+        from database import get_chat_history_page
+        limit, cursor = _page_args()
+        history, next_cursor = get_chat_history_page(current_user.id, limit, cursor)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'history': history, 'next_cursor': next_cursor, 'success': True})
+
+@api_bp.route('/export', methods=['GET'])
+def export_history():
+    # Whole history as a download, streamed: ?format=ndjson (default) or zip (with PDF reports).
+    # Supervisors can export another user with ?user_id= and the admin token.
+    from flask import stream_with_context
+    from utils.export import iter_ndjson, iter_zip
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'zip'):
+        return jsonify({'error': 'format must be ndjson or zip'}), 400
+
+    if request.args.get('user_id'):
+        from database import get_user_by_id
+        error = _admin_token_error()
+        if error:
+            return error
+        try:
+            user = get_user_by_id(int(request.args['user_id']))
+        except ValueError:
+            user = None
+        if not user:
+            return jsonify({'error': 'Unknown user'}), 404
+        user_id, user_name = user['id'], user['name']
+    elif current_user.is_authenticated:
+        user_id, user_name = current_user.id, current_user.name
+    else:
+        return current_app.login_manager.unauthorized()
+
+    stamp = datetime.date.today().strftime('%Y%m%d')
+    if export_format == 'zip':
+        body, mimetype = iter_zip(user_id, user_name), 'application/zip'
+    else:
+        body, mimetype = iter_ndjson(user_id), 'application/x-ndjson'
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=history_{user_id}_{stamp}.{export_format}'
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
 
 @api_bp.route('/chat/message', methods=['POST'])
 @login_required
@@ -171,17 +477,25 @@ def save_message():
     sender = data.get('sender')
     message = data.get('message')
     session_id = data.get('session_id') # New field
+    prediction = data.get('prediction') # Structured result when the message is a diagnosis
     
     if not sender or not message:
         return jsonify({'success': False, 'error': 'Missing data'}), 400
+
+    if prediction is not None:
+        if not isinstance(prediction, dict) or not isinstance(prediction.get('disease'), str) or not prediction['disease'].strip():
+            return jsonify({'success': False, 'error': 'Invalid prediction'}), 400
+        confidence = prediction.get('confidence')
+        prediction = {
+            'disease': prediction['disease'].strip(),
+            'confidence': float(confidence) if isinstance(confidence, (int, float)) else None,
+            'severity': str(prediction['severity']) if prediction.get('severity') else None,
+            'model': str(prediction['model']) if prediction.get('model') else None
+        }
     
     try:
         from database import save_chat_message
-        # We need to update save_chat_message in database.py to accept session_id first? 
-        # Actually I need to check if save_chat_message supports it.
-        # Let's assume I'll update database.py next or I already did (I updated the table but maybe not the function).
-        # I'll update the function call here assuming I fix datebase.py.
-        save_chat_message(current_user.id, sender, message, session_id) 
+        save_chat_message(current_user.id, sender, message, session_id, prediction=prediction)
         return jsonify({'success': True})
     except Exception as e:
         print(f"Error saving message: {e}")
@@ -220,7 +220,8 @@ const api = {
             const response = await fetch('/api/predict', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ symptoms: state.symptoms })
+                // The Model Analysis table below lists every model
+                body: JSON.stringify({ symptoms: state.symptoms, full_comparison: true })
             });
 
             frontend.removeLoading(loadingId);
@@ -297,7 +298,12 @@ const api = {
                 `;
 
                 frontend.addMessage(replyHtml, 'bot');
-                await this.saveMessage('bot', replyHtml);
+                await this.saveMessage('bot', replyHtml, {
+                    disease: diseaseName,
+                    confidence: result.confidence,
+                    severity: result.severity,
+                    model: result.model_used
+                });
 
                 frontend.updateInfoTab(result);
 
@@ -320,7 +326,7 @@ const api = {
         }
     },
 
-    async saveMessage(sender, message) {
+    async saveMessage(sender, message, prediction = null) {
         try {
             await fetch('/api/chat/message', {
                 method: 'POST',
@@ -328,7 +334,8 @@ const api = {
                 body: JSON.stringify({
                     sender,
                     message,
-                    session_id: null // Disable session association for stability
+                    session_id: null, // Disable session association for stability
+                    prediction // Structured diagnosis, stored in the diagnoses table
                 })
             });
         } catch (e) {
@@ -0,0 +1,97 @@
+import datetime
+import json
+import re
+import zipfile
+
+from database import iter_user_diagnoses, iter_user_messages, iter_user_sessions
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _line(kind, row):
+    record = {'type': kind}
+    record.update(row)
+    return json.dumps(record, ensure_ascii=False, default=str) + '\n'
+
+
+def iter_ndjson(user_id):
+    """
+    A user's sessions, messages and diagnoses as NDJSON, one record per line
+    with a "type" field. Rows come straight off database cursors, so only a
+    batch of rows is held in memory at any time.
+    """
+    for row in iter_user_sessions(user_id):
+        yield _line('session', row).encode('utf-8')
+    for row in iter_user_messages(user_id):
+        yield _line('message', row).encode('utf-8')
+    for row in iter_user_diagnoses(user_id):
+        yield _line('diagnosis', row).encode('utf-8')
+
+
+class _ChunkWriter:
+    """Write-only sink for zipfile: collects bytes until the generator drains them."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offset = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        # zipfile records member offsets from this; seek() is not offered, so
+        # it writes data descriptors instead of going back to patch headers
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def _report_name(index, disease, date):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', str(disease)).strip('_') or 'report'
+    return f"reports/{index:04d}_{slug}_{date:%Y-%m-%d}.pdf"
+
+
+def _diagnosis_date(timestamp):
+    try:
+        return datetime.datetime.strptime(str(timestamp)[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return datetime.date.today()
+
+
+def iter_zip(user_id, user_name):
+    """
+    A ZIP assembled while it is being sent: history.ndjson plus one PDF report
+    per stored diagnosis. Output is handed on every CHUNK_SIZE bytes, and
+    reports are rendered one at a time, so memory does not grow with the history.
+    """
+    from ml.predictor import predictor
+    from utils.pdf_gen import generate_pdf
+
+    sink = _ChunkWriter()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        with zf.open('history.ndjson', 'w', force_zip64=True) as member:
+            for line in iter_ndjson(user_id):
+                member.write(line)
+                if len(sink.buffer) >= CHUNK_SIZE:
+                    yield sink.drain()
+
+        for index, row in enumerate(iter_user_diagnoses(user_id), 1):
+            date = _diagnosis_date(row['timestamp'])
+            prediction = predictor.format_response(row['disease'], row['confidence'], [])
+            try:
+                pdf_bytes = generate_pdf(user_name, prediction, report_date=date)
+            except Exception as e:
+                print(f"Export: skipping report for diagnosis {row['id']}: {e}")
+                continue
+            zf.writestr(_report_name(index, row['disease'], date), pdf_bytes)
+            if len(sink.buffer) >= CHUNK_SIZE:
+                yield sink.drain()
+    yield sink.drain() # Last members and the central directory
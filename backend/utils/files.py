@@ -0,0 +1,15 @@
+import json
+import os
+import threading
+
+
+def write_json_atomic(path, data, **dump_options):
+    """
+    Writes data as JSON to path through a temporary file and os.replace, so a
+    reader sees either the old file or the complete new one. The temporary
+    name is unique per process and thread, so concurrent writers never share it.
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_options)
+    os.replace(tmp, path)
@@ -0,0 +1,203 @@
+import gzip
+import hashlib
+import os
+
+from flask import request
+
+from utils.cache import LRUCache
+
+try:
+    import brotli
+except ImportError: # Optional: gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'text/html', 'text/css', 'text/plain',
+    'application/javascript', 'text/javascript', 'image/svg+xml'
+}
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Cache-Control per endpoint. Pages render the logged-in user's name, so they
+# are private and revalidated through their ETag rather than cached blindly.
+DEFAULT_POLICIES = {
+    'api.sys_info': 'public, max-age=60',
+    'api.cache_stats': 'no-store',
+    'api.get_diagnoses': 'private, no-cache',
+    'api.get_sessions': 'private, no-store',
+    'api.get_session_chat': 'private, no-store',
+    'api.get_history': 'private, no-store',
+    'auth.get_current_user': 'private, no-store',
+    'static': 'public, no-cache', # Unfingerprinted URLs only, see _static_policy
+    'home': 'private, no-cache',
+    'login': 'private, no-cache',
+    'chat': 'private, no-cache',
+    'about': 'private, no-cache',
+    'tech': 'private, no-cache',
+    'team': 'private, no-cache',
+    'contact': 'private, no-cache',
+    'features': 'private, no-cache',
+}
+
+PAGE_ENDPOINTS = {'home', 'login', 'chat', 'about', 'tech', 'team', 'contact', 'features'}
+
+
+class HTTPCache:
+    """
+    App-wide response middleware:
+      - gzip (or brotli, when installed and preferred by the client) for
+        text responses of at least HTTP_COMPRESS_MIN_SIZE bytes
+      - ?v=<content hash> added to every url_for('static', ...) URL, and those
+        URLs served with a one-year immutable Cache-Control
+      - Cache-Control per endpoint (DEFAULT_POLICIES, overridable through
+        HTTP_CACHE_POLICIES) and ETag revalidation for HTML pages
+    Responses that already carry Content-Encoding are never recompressed, and a
+    Cache-Control set by the view wins over the policy (except on /static).
+    """
+
+    def __init__(self, app=None):
+        self.fingerprints = {}
+        self.static_bodies = LRUCache(maxsize=256)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('HTTP_CACHE_ENABLED', True)
+        app.config.setdefault('HTTP_COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('HTTP_COMPRESS_LEVEL', 6)
+        self.app = app
+        self.policies = dict(DEFAULT_POLICIES, **app.config.get('HTTP_CACHE_POLICIES', {}))
+        app.url_defaults(self._add_fingerprint)
+        app.after_request(self._after_request)
+        app.extensions['http_cache'] = self
+
+    # Static fingerprinting
+
+    def _static_path(self, filename):
+        path = os.path.abspath(os.path.join(self.app.static_folder, filename))
+        if not path.startswith(os.path.abspath(self.app.static_folder) + os.sep):
+            return None
+        return path
+
+    def fingerprint(self, filename):
+        # Short content hash, recomputed only when the file's mtime or size changes
+        path = self._static_path(filename)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.fingerprints.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        self.fingerprints[path] = (key, digest)
+        return digest
+
+    def _add_fingerprint(self, endpoint, values):
+        if endpoint != 'static' or 'v' in values or not self.app.config['HTTP_CACHE_ENABLED']:
+            return
+        digest = self.fingerprint(values.get('filename', ''))
+        if digest:
+            values['v'] = digest
+
+    def _static_policy(self):
+        # Only a URL naming the current content hash can be cached forever
+        version = request.args.get('v')
+        if version and version == self.fingerprint(request.view_args.get('filename', '')):
+            return IMMUTABLE
+        return self.policies.get('static')
+
+    # Compression
+
+    def _pick_encoding(self):
+        accept = request.accept_encodings
+        if brotli is not None and accept['br'] > 0 and accept['br'] >= accept['gzip']:
+            return 'br'
+        if accept['gzip'] > 0:
+            return 'gzip'
+        return None
+
+    def _compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=5)
+        return gzip.compress(data, compresslevel=self.app.config['HTTP_COMPRESS_LEVEL'], mtime=0)
+
+    def _static_body(self, encoding):
+        # Static files are sent as passthrough file streams; compressed copies are
+        # cached per file version so each one is only compressed once
+        path = self._static_path(request.view_args.get('filename', ''))
+        if path is None:
+            return None
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size, encoding)
+        body = self.static_bodies.get(key)
+        if body is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < self.app.config['HTTP_COMPRESS_MIN_SIZE']:
+                return None
+            body = self._compress(data, encoding)
+            self.static_bodies.set(key, body)
+        return body
+
+    def _maybe_compress(self, response):
+        if (response.status_code != 200 or response.mimetype not in COMPRESSIBLE_TYPES
+                or 'Content-Encoding' in response.headers or request.method == 'HEAD'):
+            return
+        response.vary.add('Accept-Encoding')
+        encoding = self._pick_encoding()
+        if encoding is None:
+            return
+
+        if response.direct_passthrough:
+            if request.endpoint != 'static' or 'Content-Range' in response.headers:
+                return
+            body = self._static_body(encoding)
+            if body is None:
+                return
+            response.direct_passthrough = False
+            original = response.response
+            response.set_data(body)
+            if hasattr(original, 'close'):
+                original.close()
+        elif response.is_streamed:
+            return
+        else:
+            data = response.get_data()
+            if len(data) < self.app.config['HTTP_COMPRESS_MIN_SIZE']:
+                return
+            response.set_data(self._compress(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+        # A compressed body is a different representation than the one the ETag named
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+
+    def _after_request(self, response):
+        if not self.app.config['HTTP_CACHE_ENABLED']:
+            return response
+
+        endpoint = request.endpoint
+        cacheable = request.method in ('GET', 'HEAD')
+        if cacheable and endpoint == 'static':
+            # send_static_file sets its own default, ours replaces it
+            response.headers['Cache-Control'] = self._static_policy()
+        elif cacheable and 'Cache-Control' not in response.headers and endpoint in self.policies:
+            response.headers['Cache-Control'] = self.policies[endpoint]
+
+        page = (cacheable and endpoint in PAGE_ENDPOINTS and response.status_code == 200
+                and not response.is_streamed and response.mimetype == 'text/html')
+        if page:
+            response.add_etag()
+
+        self._maybe_compress(response)
+        if response.status_code == 200 and (page or (cacheable and endpoint == 'static')):
+            # Checked after compression so the client's tag is compared with the
+            # one this representation actually carries
+            response.make_conditional(request)
+        return response
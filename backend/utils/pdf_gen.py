@@ -1,5 +1,7 @@
 from fpdf import FPDF
 import datetime
+import hashlib
+import json
 
 class HealthReportPDF(FPDF):
     def header(self):
@@ -13,23 +15,59 @@ class HealthReportPDF(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, 'Page ' + str(self.page_no()) + '/{nb}', 0, 0, 'C')
 
-def generate_pdf(user_name, prediction_data):
+# Bump whenever the layout or wording below changes, so cached reports are rebuilt
+REPORT_TEMPLATE_VERSION = 1
+
+def report_fields(user_name, prediction_data, report_date=None):
+    """
+    Everything the report prints, already formatted. Two requests with equal
+    fields get byte-identical layouts, which is what the report cache keys on.
+    The date is printed at day granularity (report_date, default today) so a
+    cached report stays correct for the rest of the day.
+    """
+    report_date = report_date or datetime.date.today()
+    precautions = prediction_data.get('precautions', [])
+    if isinstance(precautions, list):
+        # Default to English for PDF for now, or use mapped value if needed
+        precaution_lines = [f"{i}. {p.get('en', 'Consult a doctor')}" for i, p in enumerate(precautions, 1)]
+    elif isinstance(precautions, dict):
+        # Fallback for old structure
+        precaution_lines = [f"- {precautions.get('en', 'Consult a doctor')}"]
+    else:
+        precaution_lines = ["Consult a doctor"]
+    return {
+        'template': REPORT_TEMPLATE_VERSION,
+        'user_name': str(user_name),
+        'date': report_date.strftime('%Y-%m-%d'),
+        'condition': (f"{prediction_data['disease']} ({prediction_data['confidence']:.1f}%)"
+                      if prediction_data['confidence'] is not None else str(prediction_data['disease'])),
+        'severity': str(prediction_data['severity']),
+        'description': str(prediction_data['description']['en']),
+        'precautions': precaution_lines
+    }
+
+def report_key(fields):
+    # Content address of a report: sha256 over the canonical JSON of its fields
+    canonical = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def render_report(fields):
     pdf = HealthReportPDF()
     pdf.alias_nb_pages()
     pdf.add_page()
     pdf.set_font('Arial', '', 12)
     
-    pdf.cell(0, 10, f'Patient Name: {user_name}', 0, 1)
-    pdf.cell(0, 10, f'Date: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")}', 0, 1)
+    pdf.cell(0, 10, f"Patient Name: {fields['user_name']}", 0, 1)
+    pdf.cell(0, 10, f"Date: {fields['date']}", 0, 1)
     pdf.ln(10)
     
     pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, f"Predicted Condition: {prediction_data['disease']} ({prediction_data['confidence']:.1f}%)", 0, 1)
-    pdf.cell(0, 10, f"Severity: {prediction_data['severity']}", 0, 1)
+    pdf.cell(0, 10, f"Predicted Condition: {fields['condition']}", 0, 1)
+    pdf.cell(0, 10, f"Severity: {fields['severity']}", 0, 1)
     pdf.ln(5)
     
     pdf.set_font('Arial', '', 12)
-    pdf.multi_cell(0, 10, f"Description (En): {prediction_data['description']['en']}")
+    pdf.multi_cell(0, 10, f"Description (En): {fields['description']}")
     pdf.ln(5)
     
     # Precautions
@@ -37,19 +75,8 @@ def generate_pdf(user_name, prediction_data):
     pdf.set_font('Arial', 'B', 12)
     pdf.cell(0, 10, "Precautions:", 0, 1)
     pdf.set_font('Arial', '', 12)
-    
-    precautions = prediction_data.get('precautions', [])
-    if isinstance(precautions, list):
-        for i, p in enumerate(precautions, 1):
-            # Default to English for PDF for now, or use mapped value if needed
-            text = p.get('en', 'Consult a doctor')
-            pdf.cell(0, 8, f"{i}. {text}", ln=True)
-    elif isinstance(precautions, dict):
-         # Fallback for old structure
-         text = precautions.get('en', 'Consult a doctor')
-         pdf.cell(0, 8, f"- {text}", ln=True)
-    else:
-         pdf.cell(0, 8, "Consult a doctor", ln=True)
+    for line in fields['precautions']:
+        pdf.cell(0, 8, line, ln=True)
     
     pdf.ln(5)
     
@@ -57,7 +84,7 @@ def generate_pdf(user_name, prediction_data):
     pdf.set_font('Arial', 'I', 10)
     pdf.multi_cell(0, 10, "Disclaimer: This report is generated by AI and is not a substitute for professional medical advice. Please consult a doctor.")
     
-    filename = f"report_{user_name}_{datetime.datetime.now().strftime('%Y%m%d%H%M')}.pdf"
-    # Ensure reports dir exists
-    # pdf.output(f"./reports/{filename}", 'F') # Save to disk
     return pdf.output(dest='S').encode('latin-1') # Return bytes
+
+def generate_pdf(user_name, prediction_data, report_date=None):
+    return render_report(report_fields(user_name, prediction_data, report_date))
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import threading
+
+from utils.cache import LRUCache
+from utils.pdf_gen import render_report, report_fields, report_key
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ReportCache:
+    """
+    Content-addressed cache of rendered PDF reports.
+
+    Reports are keyed on report_key(report_fields(...)): a hash of exactly
+    what gets printed, including the template version and the report date.
+    The memory tier is an LRU bounded by total bytes. The optional disk tier
+    (one <key>.pdf file per report) is shared by every worker on the host and
+    trimmed to `disk_max_bytes`, oldest files first.
+    """
+
+    TRIM_EVERY = 50 # Disk writes between size checks
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, disk_dir=None, disk_max_bytes=256 * 1024 * 1024):
+        self.memory = LRUCache(maxsize=100000, max_bytes=max_bytes)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.disk_hits = 0
+        self.renders = 0
+        self.disk_evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pdf")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path) # Recently used, trimmed last
+        except OSError:
+            return None
+        return data
+
+    def _disk_set(self, key, data):
+        if not self.disk_dir:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._disk_path(key)) # Readers never see a partial file
+        except OSError as e:
+            print(f"Report cache write error: {e}")
+            return
+        with self._lock:
+            self._disk_writes += 1
+            trim = self._disk_writes % self.TRIM_EVERY == 0
+        if trim:
+            self.trim_disk()
+
+    def trim_disk(self):
+        if not self.disk_dir:
+            return
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.pdf'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+
+    def get(self, key):
+        data = self.memory.get(key)
+        if data is not None:
+            return data
+        data = self._disk_get(key)
+        if data is not None:
+            self.disk_hits += 1
+            self.memory.set(key, data)
+        return data
+
+    def get_or_render(self, user_name, prediction_data, report_date=None):
+        """Returns (key, pdf_bytes), rendering and storing the report on a miss."""
+        fields = report_fields(user_name, prediction_data, report_date)
+        key = report_key(fields)
+        data = self.get(key)
+        if data is None:
+            data = render_report(fields)
+            self.renders += 1
+            self.memory.set(key, data)
+            self._disk_set(key, data)
+        return key, data
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith('.pdf'):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def stats(self):
+        return {
+            'memory': self.memory.stats(),
+            'disk_dir': self.disk_dir,
+            'disk_hits': self.disk_hits,
+            'disk_evictions': self.disk_evictions,
+            'renders': self.renders
+        }
+
+
+def iter_chunks(data, chunk_size=CHUNK_SIZE):
+    # Streams cached bytes in fixed-size pieces instead of one large write
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
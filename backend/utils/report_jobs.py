@@ -0,0 +1,211 @@
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.files import write_json_atomic
+from utils.pdf_gen import render_report, report_key
+
+JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class JobQueueFull(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Report queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ReportJobQueue:
+    """
+    Renders PDF reports in a background pool so request workers only enqueue.
+
+    Renders run in separate processes by default (executor='process'), so a
+    slow or crashing render never holds the GIL or a request worker that
+    /api/predict needs. At most `max_pending` jobs per process may be queued
+    or rendering; beyond that submit() raises JobQueueFull with a Retry-After
+    estimate.
+
+    Job status and results live as files in `jobs_dir` (<id>.json, <id>.pdf),
+    so any worker on the host can answer a status poll or download.
+    Finished jobs are removed after `ttl` seconds.
+    """
+
+    CLEANUP_EVERY = 50 # Submissions between sweeps of expired jobs
+
+    def __init__(self, jobs_dir, max_workers=2, max_pending=32, ttl=3600, executor='process', cache=None):
+        self.jobs_dir = jobs_dir
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.executor_kind = executor
+        self.cache = cache # Optional ReportCache: hits finish instantly, renders are stored in it
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._submissions = 0
+        self._render_seconds = [] # Recent render times, for Retry-After
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def _get_executor(self):
+        # One pool per process; a pool inherited through fork is unusable
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                if self.executor_kind == 'thread':
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report')
+                else:
+                    # Never plain fork: this runs lazily in a multithreaded request worker, and a
+                    # child forked while another thread holds a lock can deadlock. The fork server
+                    # is a clean single-threaded process with the PDF code imported once up front.
+                    if 'forkserver' in multiprocessing.get_all_start_methods():
+                        context = multiprocessing.get_context('forkserver')
+                        context.set_forkserver_preload(['utils.pdf_gen'])
+                    else:
+                        context = multiprocessing.get_context('spawn')
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+                self._pid = os.getpid()
+                self._pending = 0
+            return self._executor
+
+    def _reset_executor(self, broken=None):
+        # broken: the pool that failed; a newer one created since is left alone
+        with self._lock:
+            if broken is not None and self._executor is not broken:
+                return
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _status_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def result_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.pdf")
+
+    def _save_status(self, job):
+        write_json_atomic(self._status_path(job['id']), job)
+
+    def retry_after(self):
+        # Seconds until a slot is likely free: queued work spread over the workers
+        recent = self._render_seconds[-20:]
+        average = sum(recent) / len(recent) if recent else 1.0
+        return max(1, int(round(average * self._pending / max(1, self.max_workers))))
+
+    def submit(self, fields):
+        """Queues a render of report_fields() output; returns the job status dict."""
+        job_id = uuid.uuid4().hex
+        key = report_key(fields)
+        job = {'id': job_id, 'status': 'queued', 'key': key, 'created_at': time.time(),
+               'finished_at': None, 'error': None}
+
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            self._finish(job, cached, 0.0)
+            return job
+
+        executor = self._get_executor()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFull(self.retry_after())
+            self._pending += 1
+            self._submissions += 1
+            cleanup = self._submissions % self.CLEANUP_EVERY == 0
+        self._save_status(job)
+
+        started = time.monotonic()
+        try:
+            future = executor.submit(render_report, fields)
+        except (BrokenProcessPool, RuntimeError) as e:
+            with self._lock:
+                self._pending = max(0, self._pending - 1)
+            self._reset_executor(executor)
+            self._fail(job, e)
+            return job
+        future.add_done_callback(lambda f: self._on_done(job, f, started, executor))
+        if cleanup:
+            self.cleanup()
+        return job
+
+    def _on_done(self, job, future, started, executor):
+        with self._lock:
+            self._pending = max(0, self._pending - 1)
+        try:
+            data = future.result()
+        except BrokenProcessPool as e:
+            # A render took its worker process down; start a fresh pool for the next jobs
+            self._reset_executor(executor)
+            self._fail(job, e)
+            return
+        except CancelledError:
+            self._fail(job, RuntimeError('Cancelled'))
+            return
+        except Exception as e:
+            self._fail(job, e)
+            return
+        elapsed = time.monotonic() - started
+        if self.cache is not None:
+            self.cache.memory.set(job['key'], data)
+        self._finish(job, data, elapsed)
+
+    def _finish(self, job, data, elapsed):
+        tmp = f"{self.result_path(job['id'])}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self.result_path(job['id']))
+        job.update(status='done', finished_at=time.time(), size=len(data))
+        self._save_status(job)
+        with self._lock:
+            self.completed += 1
+            self._render_seconds = self._render_seconds[-19:] + [elapsed]
+
+    def _fail(self, job, error):
+        print(f"Report job {job['id']} failed: {error}")
+        job.update(status='failed', finished_at=time.time(), error=str(error) or error.__class__.__name__)
+        self._save_status(job)
+        with self._lock:
+            self.failed += 1
+
+    def status(self, job_id):
+        """The job's status dict, or None if the id is unknown or expired."""
+        if not JOB_ID.match(job_id or ''):
+            return None
+        try:
+            with open(self._status_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def cleanup(self):
+        # Removes status and result files of jobs that finished more than ttl seconds ago
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.jobs_dir):
+            path = os.path.join(self.jobs_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                continue
+
+    def shutdown(self):
+        self._reset_executor()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executor': self.executor_kind,
+                'workers': self.max_workers,
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
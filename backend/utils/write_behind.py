@@ -0,0 +1,201 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue drained by one writer thread that hands items to
+    `flush(items)` in batches, so many small writes share one transaction.
+
+    ack='none' returns from submit() as soon as the item is queued, so anything
+    still queued is lost if the process dies. Its batches are flushed when they
+    reach `batch_size` items or when the oldest item has waited `flush_interval`
+    seconds, whichever comes first.
+
+    ack='flush' makes submit() wait until the item's batch is committed and
+    return its result (group commit). Since every caller is blocked, the writer
+    doesn't linger: it takes whatever queued up while the previous batch was
+    being written (up to `batch_size`) and commits straight away.
+    """
+
+    def __init__(self, flush, max_size=10000, batch_size=200, flush_interval=0.02, ack='flush',
+                 enqueue_timeout=1.0, name='write-behind'):
+        if ack not in ('flush', 'none'):
+            raise ValueError(f"Unknown ack mode '{ack}'")
+        self.flush = flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ack = ack
+        self.enqueue_timeout = enqueue_timeout
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._stopping = False
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.errors = 0
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        # Started lazily and per process: a writer thread doesn't survive a fork
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._pid = os.getpid()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, item):
+        """
+        Queues an item. Raises queue.Full if the queue stays full for
+        `enqueue_timeout` seconds, and RuntimeError once the queue is closed.
+        With ack='flush', returns flush()'s result for the item, or re-raises
+        its error.
+        """
+        if self._closed:
+            raise RuntimeError('Write-behind queue is closed')
+        self._ensure_started()
+        waiter = _Waiter() if self.ack == 'flush' else None
+        self._queue.put((item, waiter), timeout=self.enqueue_timeout)
+        with self._lock:
+            self.submitted += 1
+        if waiter is None:
+            return None
+        return waiter.wait()
+
+    def _next_batch(self):
+        # Blocks for the first item, then collects more until the batch is full,
+        # the queue runs dry (ack='flush') or the first one has waited flush_interval
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + (self.flush_interval if self.ack == 'none' else 0)
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                self._stopping = True # Exit once this batch is written
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._write(batch)
+            if self._stopping:
+                return
+
+    def _write(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = self.flush(items)
+        except Exception as e:
+            # Retry one by one so a single bad row doesn't take the batch down with it
+            print(f"Write-behind batch of {len(batch)} failed, retrying individually: {e}")
+            for item, waiter in batch:
+                try:
+                    result = self.flush([item])[0]
+                except Exception as item_error:
+                    print(f"Write-behind item failed: {item_error}")
+                    with self._lock:
+                        self.errors += 1
+                    if waiter:
+                        waiter.fail(item_error)
+                    continue
+                with self._lock:
+                    self.written += 1
+                    self.batches += 1
+                if waiter:
+                    waiter.done(result)
+            return
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, waiter), result in zip(batch, results):
+            if waiter:
+                waiter.done(result)
+
+    def close(self, timeout=10.0):
+        """Stops accepting items, writes everything already queued and stops the writer."""
+        self._closed = True
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            print(f"Write-behind queue '{self.name}' did not drain within {timeout}s")
+            return
+        # Items that raced in behind the stop marker are written here
+        leftovers = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _STOP:
+                leftovers.append(entry)
+        if leftovers:
+            self._write(leftovers)
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ack': self.ack,
+                'queued': self._queue.qsize(),
+                'max_size': self._queue.maxsize,
+                'submitted': self.submitted,
+                'written': self.written,
+                'batches': self.batches,
+                'avg_batch': round(self.written / self.batches, 2) if self.batches else 0.0,
+                'largest_batch': self.largest_batch,
+                'errors': self.errors
+            }
+
+
+class _Waiter:
+    __slots__ = ('_event', 'result', 'error')
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.result = None
+        self.error = None
+
+    def done(self, result):
+        self.result = result
+        self._event.set()
+
+    def fail(self, error):
+        self.error = error
+        self._event.set()
+
+    def wait(self):
+        self._event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
@@ -0,0 +1,99 @@
+"""
+Checks that the compiled forests (ml/forest_engine.py) give the same
+probabilities as scikit-learn's predict_proba, bit for bit:
+  - for the forest engines of the active artifacts, memory-mapped from disk
+  - for small fits: a deep forest, ExtraTrees, a CSR-trained forest and a
+    binary tree
+Run from the backend folder; exits with status 1 on any mismatch:
+
+    python verify_forest_engine.py [rows]
+"""
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+import scipy.sparse as sp
+
+from ml.forest_engine import ForestEngine, export_forest, save_forest
+from verify_linear_engine import dense, random_rows
+
+
+def compare(label, model, engine, rows, n_features, sparse_input=False):
+    X = dense(rows, n_features)
+    expected = model.predict_proba(sp.csr_matrix(X) if sparse_input else X)
+    actual = engine.predict_proba(rows)
+    error = float(np.abs(expected - actual).max())
+    same_top = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean())
+    ok = list(engine.classes_) == list(model.classes_) and error == 0.0
+    print(f"{label:<38} | {error:9.2e} | {same_top * 100:6.1f}% | {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def toy_models():
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    rng = np.random.default_rng(1)
+    X = (rng.random((400, 60)) < 0.15).astype(float)
+    y = np.array([f"d{i}" for i in range(12)])[(X[:, :12].argmax(axis=1) + (X.sum(axis=1) > 9)) % 12]
+    y2 = np.where(X[:, 0] + X[:, 1] > 0, 'yes', 'no')
+    fits = [
+        ('toy RandomForest (unlimited depth)', RandomForestClassifier(n_estimators=30, random_state=0), X, y, False),
+        ('toy ExtraTrees', ExtraTreesClassifier(n_estimators=30, max_depth=12, random_state=0), X, y, False),
+        ('toy RandomForest (CSR fit)', RandomForestClassifier(n_estimators=30, max_depth=15, random_state=0),
+         sp.csr_matrix(X), y, True),
+        ('toy binary DecisionTree', DecisionTreeClassifier(random_state=0), X, y2, False),
+    ]
+    for label, model, X_fit, labels, sparse_input in fits:
+        model.fit(X_fit, labels)
+        yield label, model, X.shape[1], sparse_input
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    warnings.simplefilter('ignore')
+    results = []
+
+    print(f"{'model':<38} | {'max error':>9} | {'same top':>7} |")
+    print("-" * 68)
+    from ml.predictor import predictor
+    state = predictor._ensure_loaded()
+    n_features = len(state.all_symptoms)
+    rows = random_rows(n_features, n_rows)
+    forests = {name: engine for name, engine in state.engines.items() if isinstance(engine, ForestEngine)}
+    if not forests:
+        print("No forest engines in the active artifacts (retrain with ml/train_model.py)")
+        results.append(False)
+    for name, engine in forests.items():
+        model = state.all_models[name]
+        results.append(compare(f"artifacts: {name}", model, engine, rows, n_features,
+                               sparse_input=state.feature_format == 'csr'))
+        # One row at a time must agree with the batch
+        results.append(all(np.array_equal(engine.predict_proba([row]), engine.predict_proba(rows)[i:i + 1])
+                           for i, row in enumerate(rows[:50])))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i, (label, model, n_features, sparse_input) in enumerate(toy_models()):
+            # Through save + mmap load, like the server
+            save_forest(f"{directory}/{i}", export_forest(model))
+            results.append(compare(label, model, ForestEngine.load(f"{directory}/{i}"), random_rows(n_features, 200),
+                                   n_features, sparse_input))
+
+        # Real-valued features one float32 step apart: split thresholds fall halfway
+        # between two representable values and must be rounded down, not to nearest
+        from sklearn.ensemble import RandomForestClassifier
+        rng = np.random.default_rng(2)
+        X = (1 + rng.integers(0, 32, size=(400, 8)) * np.finfo(np.float32).eps).astype(np.float32)
+        model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, (X[:, 0] + X[:, 1] > X[:, 2] + X[:, 3]))
+        engine = ForestEngine(export_forest(model))
+        error = float(np.abs(model.predict_proba(X) - engine.predict_proba_matrix(X)).max())
+        print(f"{'toy RandomForest (real-valued)':<38} | {error:9.2e} | {'':>7} | {'ok' if error == 0.0 else 'FAIL'}")
+        results.append(error == 0.0)
+
+    print(f"\n{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
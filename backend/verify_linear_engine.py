@@ -0,0 +1,108 @@
+"""
+Checks that the NumPy engines (ml/linear_engine.py) give the same
+probabilities as scikit-learn's predict_proba:
+  - for the engines exported with the active artifacts, against their models
+  - for small fits covering the binary, one-vs-rest and CSR-trained cases
+Softmax/logistic scores must match to float precision. The linear SVM's
+multiclass coupling is solved exactly here while libsvm stops iterating at
+0.005 / n_classes, so it must match to 5e-3 with the same top class (on the
+99-class model the difference is around 1e-4).
+Run from the backend folder; exits with status 1 on any mismatch:
+
+    python verify_linear_engine.py [rows]
+"""
+import sys
+import warnings
+
+import numpy as np
+import scipy.sparse as sp
+
+from ml.linear_engine import LinearEngine, export_model
+
+TOLERANCE = {'ovo_svc': 5e-3}
+DEFAULT_TOLERANCE = 1e-9
+
+
+def random_rows(n_features, n, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = [tuple(sorted(set(rng.integers(0, n_features, size=rng.integers(1, 7)).tolist()))) for _ in range(n)]
+    return rows + [()] # No active symptom at all
+
+
+def dense(rows, n_features):
+    X = np.zeros((len(rows), n_features))
+    for i, row in enumerate(rows):
+        X[i, list(row)] = 1
+    return X
+
+
+def compare(label, model, engine, rows, n_features, sparse_input=False):
+    X = dense(rows, n_features)
+    expected = model.predict_proba(sp.csr_matrix(X) if sparse_input else X)
+    actual = engine.predict_proba(rows)
+    error = float(np.abs(expected - actual).max())
+    same_top = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean())
+    ok = (list(engine.classes_) == list(model.classes_) and error <= TOLERANCE.get(engine.kind, DEFAULT_TOLERANCE)
+          and (engine.kind != 'ovo_svc' or same_top == 1.0))
+    print(f"{label:<38} | {engine.kind:<15} | {error:9.2e} | {same_top * 100:6.1f}% | {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def toy_models():
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.svm import SVC
+
+    rng = np.random.default_rng(1)
+    X = (rng.random((300, 40)) < 0.15).astype(float)
+    y4 = np.array(['a', 'b', 'c', 'd'])[(X[:, :4].argmax(axis=1) + (X.sum(axis=1) > 6)) % 4]
+    y2 = np.where(X[:, 0] + X[:, 1] > 0, 'yes', 'no')
+    fits = [
+        ('toy binary LogisticRegression', LogisticRegression(max_iter=1000), X, y2, False),
+        ('toy binary MultinomialNB', MultinomialNB(), X, y2, False),
+        ('toy binary SVC', SVC(kernel='linear', probability=True, random_state=0), X, y2, False),
+        ('toy 4-class SVC', SVC(kernel='linear', probability=True, random_state=0), X, y4, False),
+        ('toy 4-class SVC (CSR fit)', SVC(kernel='linear', probability=True, random_state=0), sp.csr_matrix(X), y4, True),
+        ('toy 4-class LogisticRegression (CSR)', LogisticRegression(max_iter=1000), sp.csr_matrix(X), y4, True),
+    ]
+    try:
+        fits.append(('toy 4-class LogisticRegression ovr', LogisticRegression(max_iter=1000, multi_class='ovr'), X, y4, False))
+    except TypeError:
+        pass # multi_class no longer exists in this scikit-learn
+    for label, model, X_fit, y, sparse_input in fits:
+        model.fit(X_fit, y)
+        yield label, model, X.shape[1], sparse_input
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    warnings.simplefilter('ignore')
+    results = []
+
+    print(f"{'model':<38} | {'kind':<15} | {'max error':>9} | {'same top':>7} |")
+    print("-" * 84)
+    from ml.predictor import predictor
+    state = predictor._ensure_loaded()
+    n_features = len(state.all_symptoms)
+    rows = random_rows(n_features, n_rows)
+    engines = {name: engine for name, engine in state.engines.items() if isinstance(engine, LinearEngine)}
+    if not engines:
+        print("No engines in the active artifacts (retrain with ml/train_model.py)")
+        results.append(False)
+    for name, engine in engines.items():
+        model = state.all_models[name]
+        results.append(compare(f"artifacts: {name}", model, engine, rows, n_features,
+                               sparse_input=state.feature_format == 'csr'))
+        # What is written to the manifest must load back to the same scorer
+        results.append(compare(f"re-exported: {name}", model, LinearEngine(export_model(model)), rows, n_features,
+                               sparse_input=state.feature_format == 'csr'))
+
+    for label, model, n_features, sparse_input in toy_models():
+        results.append(compare(label, model, LinearEngine(export_model(model)), random_rows(n_features, 200), n_features, sparse_input))
+
+    print(f"\n{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Checks DiseasePredictor.predict_batch row by row:
+  - a row mixing known and unknown symptoms is predicted from the known ones
+    and lists the unknown ones in 'unknown_symptoms'
+  - a row of known symptoms only has no 'unknown_symptoms'
+  - a row of unknown symptoms only is an error listing all of them
+  - an empty row is an error
+  - each predicted row matches predict_batch on that row alone, cached or not
+Run from the backend folder after training; exits with status 1 on any failure:
+
+    python verify_predict_batch.py
+"""
+import sys
+import warnings
+
+from ml.predictor import predictor
+
+
+def check(label, ok):
+    print(f"{label:<52} | {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    warnings.simplefilter('ignore')
+    state = predictor._ensure_loaded()
+    if state.all_symptoms is None:
+        print("No model loaded (train with ml/train_model.py first)")
+        sys.exit(1)
+    known = [str(s) for s in state.all_symptoms[:3]]
+    sets = [
+        [known[0], 'not a symptom', known[1], 'Also Unknown'],
+        [known[0], known[1]],
+        ['not a symptom'],
+        [],
+    ]
+    predictor.prediction_cache.clear()
+    mixed, only_known, only_unknown, empty = predictor.predict_batch(sets)
+    results = [
+        check("mixed row: predicted", 'disease' in mixed and 'error' not in mixed),
+        check("mixed row: unknown_symptoms as given",
+              mixed.get('unknown_symptoms') == ['not a symptom', 'Also Unknown']),
+        check("mixed row: matched_symptoms are the known ones",
+              mixed.get('matched_symptoms') == [known[0].lower(), known[1].lower()]),
+        check("mixed row: same disease as the known symptoms alone", mixed.get('disease') == only_known.get('disease')),
+        check("known row: no unknown_symptoms", 'disease' in only_known and 'unknown_symptoms' not in only_known),
+        check("unknown row: error with unknown_symptoms",
+              'error' in only_unknown and only_unknown.get('unknown_symptoms') == ['not a symptom']),
+        check("empty row: error", 'error' in empty and 'unknown_symptoms' not in empty),
+    ]
+    # Second pass hits the prediction cache; the unknown symptoms must still be reported
+    alone = predictor.predict_batch([sets[0]])[0]
+    results.append(check("mixed row alone (cached): same result", alone == mixed))
+
+    print(f"\n{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()